@@ -0,0 +1,44 @@
+import time
+from config import ALERT_COOLDOWN
+
+# Alert type -> estimator flag it is raised from. These are the alerts counted
+# in the sessions table. Emotion alerts are not among them: the original live
+# loop never fired one, so counting them would change stored totals.
+ALERT_FLAGS = (("yawn", "yawn_alert"), ("blink", "blink_alert"))
+# What the UIs without Streamlit say when an alert fires
+ALERT_MESSAGES = {"yawn": "Yawning!", "blink": "Drowsy!"}
+
+
+class AlertTracker:
+    # Turns alert flags (on an estimator or a FrameResult) into counted alerts:
+    # each type fires at most once per `cooldown` seconds. Posture and emotion
+    # are shown from their flags but never counted.
+    def __init__(self, cooldown=ALERT_COOLDOWN):
+        self.cooldown = cooldown
+        self.last_fired = {kind: float("-inf") for kind, _ in ALERT_FLAGS}
+        self.total = 0
+        self.events = []  # (timestamp, kind) of every alert that fired
+
+    def update(self, source, now=None):
+        # Returns the alert types that fired on this frame
+        now = time.time() if now is None else now
+        fired = []
+        for kind, flag in ALERT_FLAGS:
+            if getattr(source, flag, False) and now - self.last_fired[kind] > self.cooldown:
+                self.last_fired[kind] = now
+                fired.append(kind)
+                self.events.append((now, kind))
+        self.total += len(fired)
+        return fired
+
+
+def merge_alert_events(event_lists, cooldown=ALERT_COOLDOWN):
+    # Re-applies the cooldown across separately analysed pieces of one
+    # recording (event timestamps must share a clock). Returns (total, by_kind).
+    last = {}
+    by_kind = {}
+    for now, kind in sorted(e for events in event_lists for e in events):
+        if now - last.get(kind, float("-inf")) > cooldown:
+            last[kind] = now
+            by_kind[kind] = by_kind.get(kind, 0) + 1
+    return sum(by_kind.values()), by_kind
@@ -1,12 +1,20 @@
 import streamlit as st
 import cv2
 from focus_detector import FocusEstimator 
-from pro_detector import ProEstimator 
+from capture import CapturePipeline
+from video_source import open_source
+from preview import PreviewRenderer, StatThrottle
+from profiling import StageProfiler, GcMonitor, NULL_PROFILER
+from alerts import AlertTracker
+from config import PROFILING, PROFILE_DIR, RECORD_LANDMARKS, TIMELINE, DASHBOARD_PAGE_SIZE, POMODORO_MINUTES
+from recorder import LandmarkRecorder
+from timeline import TimelineWriter
+import startup_report
 import time
 import base64
 import streamlit.components.v1 as components
 import db
-from datetime import datetime
+from datetime import datetime, timedelta
 import pandas as pd
 
 # CUSTOM CSS FUNCTION 
@@ -42,6 +50,18 @@ if 'total_alerts' not in st.session_state:
     st.session_state.total_alerts = 0
 if 'cap' not in st.session_state:
     st.session_state.cap = None 
+if 'pipeline' not in st.session_state:
+    st.session_state.pipeline = None
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = None
+if 'gc_monitor' not in st.session_state:
+    st.session_state.gc_monitor = None
+if 'recorder' not in st.session_state:
+    st.session_state.recorder = None
+if 'timeline' not in st.session_state:
+    st.session_state.timeline = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = None
 if 'last_annotated_frame' not in st.session_state:
     st.session_state.last_annotated_frame = None
 
@@ -57,6 +77,110 @@ def play_sound(file_path):
     """
     components.html(audio_html, height=0)
 
+# Stop the capture/analysis threads before the camera is released.
+# Returns False if the analysis thread is still running (stuck in a frame).
+def release_capture(timeout=2.0):
+    stopped = True
+    if st.session_state.pipeline is not None:
+        stopped = st.session_state.pipeline.stop(timeout)
+        st.session_state.pipeline = None
+    if st.session_state.cap is not None:
+        st.session_state.cap.release()
+        st.session_state.cap = None
+    return stopped
+
+# Every way a live session ends (Stop, feed lost, analysis error, failed start)
+# goes through here: threads stopped, recorder and timeline writer closed, and
+# the session row either completed (save=True) or dropped. Returns True if saved.
+def end_live_session(save=True):
+    st.session_state.session_running = False
+    st.session_state.pomodoro_running = False
+    # The sinks are closed only once the analysis thread has really exited;
+    # otherwise they are left as they are (the recording keeps its last meta.json)
+    stopped = release_capture(timeout=10.0)
+    if not stopped:
+        st.warning("The analysis thread did not stop in time; the recording may end early.")
+
+    recording = None
+    if st.session_state.recorder is not None:
+        recording = st.session_state.recorder.path
+        if stopped:
+            st.session_state.recorder.close()
+        st.session_state.recorder = None
+    if st.session_state.timeline is not None:
+        if stopped:
+            st.session_state.timeline.close()
+        st.session_state.timeline = None
+
+    saved = False
+    estimator = st.session_state.estimator
+    if save and estimator is not None:
+        session_data = {
+            "username": "pundra_student",
+            "start_time": st.session_state.session_start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "focused_seconds": int(estimator.focused_seconds),
+            "distracted_seconds": int(estimator.distracted_seconds),
+            "drowsy_seconds": int(estimator.drowsy_seconds),
+            "alerts": st.session_state.total_alerts,
+            "recording": recording
+        }
+        if st.session_state.session_id is not None:
+            db.end_session(st.session_state.session_id, session_data)
+        else:
+            db.insert_session(session_data)
+        saved = True
+    elif st.session_state.session_id is not None:
+        db.discard_session(st.session_state.session_id)
+    st.session_state.session_id = None
+
+    profiler = st.session_state.profiler
+    if profiler is not None and PROFILE_DIR and saved:
+        profiler.dump(
+            f"{PROFILE_DIR}/session_{st.session_state.session_start_time:%Y%m%d_%H%M%S}.json",
+            mode=st.session_state.mode
+        )
+    st.session_state.profiler = None
+    if st.session_state.gc_monitor is not None:
+        st.session_state.gc_monitor.stop()
+        st.session_state.gc_monitor = None
+    st.session_state.last_annotated_frame = None
+    st.session_state.estimator = None
+    return saved
+
+
+# --- Dashboard data (cached; `version` changes whenever a session is saved) ---
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_totals(version):
+    return db.fetch_totals()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_daily(version):
+    df = pd.DataFrame(db.fetch_daily(), columns=['day', 'sessions', 'total_seconds', 'focus_percent', 'alerts'])
+    df['day'] = pd.to_datetime(df['day'])
+    df['focus_percent'] = df['focus_percent'].round(1)
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_session_count(version, start_time, end_time):
+    return db.count_sessions(start_time, end_time)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_session_page(version, start_time, end_time, page):
+    rows = db.fetch_sessions(start_time, end_time, DASHBOARD_PAGE_SIZE, (page - 1) * DASHBOARD_PAGE_SIZE)
+    df = pd.DataFrame(
+        rows,
+        columns=[
+            'id', 'username', 'start_time', 'end_time', 
+            'focused_seconds', 'distracted_seconds', 'drowsy_seconds', 'alerts', 'recording'
+        ]
+    )
+    df['start_time'] = pd.to_datetime(df['start_time'])
+    df['total_seconds'] = df['focused_seconds'] + df['distracted_seconds'] + df['drowsy_seconds']
+    df['total_minutes'] = (df['total_seconds'] / 60).round(1)
+    df['focus_percent'] = (df['focused_seconds'] / df['total_seconds'] * 100).round(1)
+    return df
+
 
 tab1, tab2 = st.tabs(["Live Session", " Dashboard"])
 
@@ -76,6 +200,7 @@ with tab1:
                 disabled=st.session_state.session_running 
             )
             mode = st.session_state.mode_select
+            st.checkbox("Show profiling panel", key="show_profiling")
         
         with c2:
  
@@ -98,7 +223,7 @@ with tab1:
             if mode == "Pomodoro":
                 with sc3:
                     start_pomodoro = st.button(
-                        "⏱ Start Pomodoro (25 min)", 
+                        f"⏱ Start Pomodoro ({POMODORO_MINUTES} min)", 
                         key="start_pomodoro", 
                         disabled=not st.session_state.session_running or st.session_state.pomodoro_running,
                         use_container_width=True
@@ -124,6 +249,7 @@ with tab1:
                 # Placeholders for Pomodoro and Alerts
                 pomodoro_placeholder = st.empty()
                 alert_placeholder = st.empty()
+                perf_placeholder = st.empty()
                 
                 st.divider()
                 st.markdown("### Live Counters")
@@ -135,147 +261,180 @@ with tab1:
                     drowsy_placeholder = st.empty()
                 with metric_col3:
                     distract_placeholder = st.empty()
+
+            if st.session_state.show_profiling:
+                with st.container(border=True):
+                    st.markdown("### Stage Latency")
+                    profiling_placeholder = st.empty()
+
+    # Import / model-load cost measured in this process (see startup_report.py)
+    startup_timings = startup_report.report()
+    if startup_timings:
+        with st.expander("Startup timings"):
+            st.dataframe(startup_timings, use_container_width=True)
         
 
-    pomodoro_duration = 25 * 60  # 25 minutes
-    alert_cooldown = {"blink": 0, "yawn": 0, "emotion": 0}
-    COOLDOWN_TIME = 5 
+    pomodoro_duration = POMODORO_MINUTES * 60
+    alerts = AlertTracker()
 
     # --- Session Logic ---
     if start_session:
-        st.session_state.cap = cv2.VideoCapture(0)
-        if not st.session_state.cap.isOpened():
+        st.session_state.cap = open_source()
+        if st.session_state.cap is None:
             st.warning("Cannot access webcam.")
-            st.session_state.cap = None
         else:
-            st.session_state.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            st.session_state.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            
             st.session_state.session_running = True
             st.session_state.session_start_time = datetime.now()
             st.session_state.mode = mode 
             
+            st.session_state.profiler = StageProfiler() if PROFILING else None
+            if st.session_state.profiler is not None:
+                # GC pauses show up as gc_gen* stages next to the frame stages
+                st.session_state.gc_monitor = GcMonitor(st.session_state.profiler).start()
+            
             try:
                 if st.session_state.mode == "Pro":
                     with st.spinner("Loading Pro Model (this may take a moment)..."):
-                        st.session_state.estimator = ProEstimator()
+                        # TensorFlow & co. are only imported once Pro mode is actually started
+                        ProEstimator = startup_report.timed_import("pro_detector").ProEstimator
+                        st.session_state.estimator = ProEstimator(profiler=st.session_state.profiler)
                 else: 
                     with st.spinner("Loading Detector..."):
-                        st.session_state.estimator = FocusEstimator()
+                        st.session_state.estimator = FocusEstimator(profiler=st.session_state.profiler)
                 
                 st.session_state.total_alerts = 0
                 st.session_state.last_annotated_frame = None
+                # Optional per-frame landmark recording, linked from the session row
+                st.session_state.recorder = LandmarkRecorder.for_session(
+                    st.session_state.session_start_time, "pundra_student"
+                ) if RECORD_LANDMARKS else None
+                # The per-second timeline needs the session row's id up front
+                st.session_state.session_id = None
+                st.session_state.timeline = None
+                if TIMELINE:
+                    st.session_state.session_id = db.begin_session(
+                        "pundra_student", st.session_state.session_start_time.strftime("%Y-%m-%d %H:%M:%S")
+                    )
+                    st.session_state.timeline = TimelineWriter(st.session_state.session_id)
+                sinks = [s for s in (st.session_state.recorder, st.session_state.timeline) if s is not None]
+                st.session_state.pipeline = CapturePipeline(
+                    st.session_state.cap, st.session_state.estimator,
+                    profiler=st.session_state.profiler or NULL_PROFILER,
+                    sinks=sinks
+                )
+                st.session_state.pipeline.start()
                 st.rerun()
             except Exception as e:
                 st.error(f"Error loading model: {e}")
                 st.error("Did you place 'fer_model.h5' and 'shape_predictor_68_face_landmarks.dat' in the folder?")
-                st.session_state.session_running = False
-                if st.session_state.cap:
-                    st.session_state.cap.release()
-                st.session_state.cap = None
+                end_live_session(save=False)
 
     if stop_session:
-        st.session_state.session_running = False
-        st.session_state.pomodoro_running = False
-        
-        if st.session_state.cap is not None:
-            st.session_state.cap.release()
-            st.session_state.cap = None
-        
-        estimator = st.session_state.estimator
-        if estimator is not None:
-            session_data = {
-                "username": "pundra_student",
-                "start_time": st.session_state.session_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "focused_seconds": int(estimator.focused_seconds),
-                "distracted_seconds": int(estimator.distracted_seconds),
-                "drowsy_seconds": int(estimator.drowsy_seconds),
-                "alerts": st.session_state.total_alerts
-            }
-            db.insert_session(session_data)
+        if end_live_session():
             st.success("Session stopped and saved!")
-        
         frame_placeholder.empty()
-        st.session_state.last_annotated_frame = None
-        st.session_state.estimator = None
         st.rerun()
 
     # --- Main Loop ---
-    frame_counter = 0
+    # Camera reads and analysis run on their own threads (see capture.py);
+    # this loop only renders the newest frame and verdict.
     estimator = st.session_state.estimator 
-
-    if st.session_state.session_running and st.session_state.cap is not None and estimator is not None:
+    pipeline = st.session_state.pipeline
+    frame_seq = 0
+    # Rendering runs at its own rate, independent of capture and analysis
+    profiler = st.session_state.profiler or NULL_PROFILER
+    preview = PreviewRenderer(profiler=profiler)
+    stats = StatThrottle()
+    profiling_shown_at = 0.0
+
+    if st.session_state.session_running and pipeline is not None and estimator is not None:
         while True: 
-            ret, frame = st.session_state.cap.read()
-            if not ret:
-                st.warning("Webcam feed lost.")
-                st.session_state.session_running = False
+            frame_seq, item = pipeline.wait_for_frame(frame_seq)
+            if pipeline.failed:
+                st.warning("Webcam feed lost. The session so far has been saved.")
+                end_live_session()
+                break
+            if pipeline.error is not None:
+                st.error(f"Analysis stopped: {pipeline.error}. The session so far has been saved.")
+                end_live_session()
                 break
+            if item is None:
+                continue
 
-            frame = cv2.flip(frame, 1)
-            
-            # Optimization
-            frame_counter += 1
-            annotated_frame = None
+            # Newest preview frame with the newest verdict (None until the first one)
+            _, frame, result = item
             
-            if frame_counter % 6 == 0:
-                annotated_frame = estimator.process_frame(frame) 
-                st.session_state.last_annotated_frame = annotated_frame
-            else:
-                if st.session_state.last_annotated_frame is not None:
-                    annotated_frame = st.session_state.last_annotated_frame
-                else:
-                    annotated_frame = frame 
-            
-            frame_placeholder.image(
-                cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB),
-                channels="RGB",
-                use_container_width=True
-            )
-
-            # --- Update Live Dashboard ---
+            # Annotation only happens for frames the preview will actually show
+            if preview.ready():
+                with profiler.stage("render"):
+                    if result is not None:
+                        # Draw on a reused canvas; the analysed frame itself stays untouched
+                        canvas = preview.buffers.get("canvas", frame.shape)
+                        canvas[...] = frame
+                        frame = estimator.draw(canvas, result)
+                    jpeg = preview.render(frame)
+                    if jpeg is not None:
+                        frame_placeholder.image(jpeg, use_container_width=True)
+
+            # --- Update Live Dashboard (only when values changed meaningfully) ---
             total_seconds = estimator.focused_seconds + estimator.drowsy_seconds + estimator.distracted_seconds
             focus_percent = (estimator.focused_seconds / max(1, total_seconds))
-            focus_percent_text = f"Focus: {focus_percent*100:.1f}%"
-            
-            focus_percent_placeholder.progress(float(focus_percent), text=focus_percent_text) 
+            if stats.should_update("focus_percent", focus_percent, tolerance=0.001):
+                focus_percent_text = f"Focus: {focus_percent*100:.1f}%"
+                focus_percent_placeholder.progress(float(focus_percent), text=focus_percent_text) 
             
             # Show hundredths of a second (like milliseconds)
-            focus_placeholder.metric("🎯 Focus", f"{estimator.focused_seconds:.2f}s")
-            drowsy_placeholder.metric("😴 Drowsy", f"{estimator.drowsy_seconds:.2f}s")
-            distract_placeholder.metric("😵 Distracted", f"{estimator.distracted_seconds:.2f}s")
-
-
-            current_time = time.time()
+            if stats.should_update("focused", estimator.focused_seconds, tolerance=0.05):
+                focus_placeholder.metric("🎯 Focus", f"{estimator.focused_seconds:.2f}s")
+            if stats.should_update("drowsy", estimator.drowsy_seconds, tolerance=0.05):
+                drowsy_placeholder.metric("😴 Drowsy", f"{estimator.drowsy_seconds:.2f}s")
+            if stats.should_update("distracted", estimator.distracted_seconds, tolerance=0.05):
+                distract_placeholder.metric("😵 Distracted", f"{estimator.distracted_seconds:.2f}s")
+
+            # Analysis rate picked by the adaptive scheduler
+            scheduler = pipeline.scheduler
+            perf_text = (
+                f"Analysing {scheduler.analysis_fps:.1f} fps · camera {scheduler.camera_fps:.0f} fps · "
+                f"latency {pipeline.latency * 1000:.0f} ms"
+                + (" · idle (no one in view)" if scheduler.idle else "")
+            )
+            if stats.should_update("perf", perf_text, min_interval=2.0):
+                perf_placeholder.caption(perf_text)
+
+            # p50 / p99 per stage
+            if st.session_state.show_profiling and time.monotonic() - profiling_shown_at > 2.0:
+                profiling_shown_at = time.monotonic()
+                with profiling_placeholder.container():
+                    st.dataframe(profiler.summary(), use_container_width=True, hide_index=True)
+                    # Buffer (re)allocations: should stop growing after the first frames
+                    allocations = profiler.counters()
+                    if allocations:
+                        st.caption(" · ".join(f"{name} {n}" for name, n in sorted(allocations.items())))
+
+
+            # Alerts come from the verdict being shown, not from the estimator,
+            # which the analysis thread may already have moved on to a newer frame
+            fired = alerts.update(result, result.timestamp) if result is not None else []
+            st.session_state.total_alerts += len(fired)
             alert_text = ""
 
-            if estimator.yawn_alert and current_time - alert_cooldown["yawn"] > COOLDOWN_TIME:
+            if "yawn" in fired:
                 play_sound("alert.wav")
-                alert_cooldown["yawn"] = current_time
                 alert_text += "⚠️ Yawning! "
-                st.session_state.total_alerts += 1
 
-            if estimator.blink_alert and current_time - alert_cooldown["blink"] > COOLDOWN_TIME:
+            if "blink" in fired:
                 play_sound("alert.wav")
-                alert_cooldown["blink"] = current_time
                 alert_text += "⚠️ Drowsy! "
-                st.session_state.total_alerts += 1
 
-            if estimator.posture_alert:
+            if result is not None and result.posture_alert:
                 alert_text += "⚠️ Sit upright! "
 
-            if st.session_state.mode == "Pro":
-                
-                if estimator.emotion_alert and current_time - alert_cooldown["emotion"] > current_time:
-                    alert_cooldown["emotion"] = current_time
-                    alert_text += f"⚠️ Distracted ({estimator.current_emotion})! "
-                    st.session_state.total_alerts += 1
-
-            if alert_text:
-                alert_placeholder.error(alert_text)
-            else:
-                alert_placeholder.empty()
+            # Alerts are pushed as soon as they change
+            if stats.should_update("alert", alert_text, min_interval=0):
+                if alert_text:
+                    alert_placeholder.error(alert_text)
+                else:
+                    alert_placeholder.empty()
 
             if start_pomodoro and not st.session_state.pomodoro_running:
                 st.session_state.pomodoro_start_time = time.time()
@@ -289,7 +448,9 @@ with tab1:
                 minutes = int(remaining // 60)
                 seconds = int(remaining % 60)
                 
-                pomodoro_placeholder.markdown(f"### ⏳ Pomodoro: {minutes:02d}:{seconds:02d}")
+                pomodoro_text = f"### ⏳ Pomodoro: {minutes:02d}:{seconds:02d}"
+                if stats.should_update("pomodoro", pomodoro_text, min_interval=0):
+                    pomodoro_placeholder.markdown(pomodoro_text)
 
                 if remaining <= 0:
                     play_sound("alert.wav") 
@@ -304,9 +465,7 @@ with tab1:
     # --- End of While Loop ---
 
 # --- Cleanup ---
-if st.session_state.cap is not None:
-    st.session_state.cap.release()
-    st.session_state.cap = None
+release_capture()
 cv2.destroyAllWindows()
 
 # --- TAB 2: DASHBOARD ---
@@ -315,48 +474,48 @@ with tab2:
     st.header("Your Study Dashboard")
     st.write("Review your past performance and see your focus trends over time.")
 
-    sessions = db.fetch_all()
+    # Everything below comes from the rollup tables or one indexed page of
+    # sessions, cached until another session is saved (dashboard_version)
+    dashboard_version = db.dashboard_version()
+    total_sessions, total_seconds, avg_focus = load_totals(dashboard_version)
     
-    if not sessions:
+    if not total_sessions:
         st.info("You don't have any saved study sessions yet. Complete a session in the 'Live Session' tab to see your stats here!")
     else:
-        # --- Convert DB data to Pandas DataFrame ---
-        df = pd.DataFrame(
-            sessions,
-            columns=[
-                'id', 'username', 'start_time', 'end_time', 
-                'focused_seconds', 'distracted_seconds', 'drowsy_seconds', 'alerts'
-            ]
-        )
-        # Convert times to datetime objects for plotting
-        df['start_time'] = pd.to_datetime(df['start_time'])
-        
-        # --- Create new metrics for the dashboard ---
-        df['total_seconds'] = df['focused_seconds'] + df['distracted_seconds'] + df['drowsy_seconds']
-        df['total_minutes'] = (df['total_seconds'] / 60).round(1)
-        df['focus_percent'] = (df['focused_seconds'] / df['total_seconds'] * 100).round(1)
-        
-      
-        df_chart = df.set_index('start_time')
-
         # --- Show Key Metrics ---
         st.subheader("All-Time Stats")
         with st.container(border=True):
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total Sessions", len(df))
-            col2.metric("Total Study Time", f"{df['total_minutes'].sum():.1f} min")
-            col3.metric("Avg. Focus %", f"{df['focus_percent'].mean():.1f}%")
+            col1.metric("Total Sessions", total_sessions)
+            col2.metric("Total Study Time", f"{total_seconds / 60:.1f} min")
+            col3.metric("Avg. Focus %", f"{avg_focus:.1f}%" if avg_focus is not None else "---")
 
         st.divider()
 
+        # --- Time range ---
+        df_daily = load_daily(dashboard_version)
+        first_day, last_day = df_daily['day'].min().date(), df_daily['day'].max().date()
+        picked = st.date_input("Date range", value=(first_day, last_day), key="dashboard_range")
+        range_start, range_end = (picked[0], picked[-1]) if picked else (first_day, last_day)
+        df_range = df_daily[(df_daily['day'].dt.date >= range_start) & (df_daily['day'].dt.date <= range_end)]
+        df_chart = df_range.set_index('day')
+
         # --- Show Charts ---
         st.subheader("Focus % Over Time")
         st.line_chart(df_chart['focus_percent'])
 
-        st.subheader("Alerts Per Session")
+        st.subheader("Alerts Per Day")
         st.bar_chart(df_chart['alerts'])
 
+        # Sessions in the range, one page at a time (newest first)
+        range_start_time = range_start.strftime("%Y-%m-%d")
+        range_end_time = (range_end + timedelta(days=1)).strftime("%Y-%m-%d")
+        sessions_in_range = load_session_count(dashboard_version, range_start_time, range_end_time)
+        pages = max(1, -(-sessions_in_range // DASHBOARD_PAGE_SIZE))
+
         with st.expander("Show Raw Session Data"):
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="dashboard_page")
+            df = load_session_page(dashboard_version, range_start_time, range_end_time, int(page))
            
             df_display = df[[
                 'start_time', 'end_time', 'total_minutes', 
@@ -368,8 +527,32 @@ with tab2:
                 'Focus %', 'Alerts'
             ]
             
-            df_display.index = pd.RangeIndex(start=1, stop=len(df_display) + 1)
+            offset = (int(page) - 1) * DASHBOARD_PAGE_SIZE
+            df_display.index = pd.RangeIndex(start=offset + 1, stop=offset + len(df_display) + 1)
             df_display.index.name = "Session"
             
             # 4. Display the clean DataFrame
-            st.dataframe(df_display, use_container_width=True)
\ No newline at end of file
+            st.dataframe(df_display, use_container_width=True)
+            st.caption(f"{sessions_in_range} sessions between {range_start} and {range_end}")
+
+        # --- Per-second timeline of one session ---
+        with st.expander("Session Timeline"):
+            if df.empty:
+                st.info("No sessions in this date range.")
+            else:
+                session_labels = {row.id: f"{row.start_time:%Y-%m-%d %H:%M} ({row.total_minutes} min)"
+                                  for row in df.itertuples()}
+                timeline_session = st.selectbox("Session", list(session_labels), format_func=session_labels.get)
+                timeline_rows = db.fetch_timeline(timeline_session)
+                if not timeline_rows:
+                    st.info("No timeline was recorded for this session.")
+                else:
+                    df_timeline = pd.DataFrame(
+                        timeline_rows, columns=['second', 'state', 'ear', 'mar', 'emotion', 'alert_flags']
+                    )
+                    df_timeline['minute'] = df_timeline['second'] / 60
+                    # 0 = focused, 1 = distracted, 2 = drowsy
+                    df_timeline['focused'] = (df_timeline['state'] == 0).astype(int)
+                    st.caption("Focused (1) / not focused (0), per second")
+                    st.area_chart(df_timeline.set_index('minute')['focused'])
+                    st.line_chart(df_timeline.set_index('minute')[['ear', 'mar']])
@@ -0,0 +1,195 @@
+"""Focused / distracted / drowsy breakdown for recorded study videos.
+
+    python batch_analyze.py recordings/*.mp4 --mode normal --workers 8
+
+Recordings are split by file and by time chunk across a process pool; each
+worker loads the dlib (and FER) models once. Per-file results are merged and
+written to the sessions table in one transaction. Files that can't be opened
+are skipped and reported.
+
+Every chunk but the first starts EYE_AR_CONSEC_FRAMES analysed frames early
+and discards those verdicts, so a closed-eye run or a face track crossing a
+chunk seam is picked up as in one long run. State older than that (longer eye
+runs, the presence monitor's idle countdown) still restarts at each seam.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from datetime import datetime, timedelta
+
+import cv2
+import db
+from alerts import AlertTracker, merge_alert_events
+from config import BATCH_ANALYSIS_FPS, BATCH_CHUNK_SECONDS, EYE_AR_CONSEC_FRAMES
+from session import make_estimator
+
+_worker_mode = None
+
+
+def _init_worker(mode):
+    # Runs once in every pool process: fill this process' model registry
+    global _worker_mode
+    _worker_mode = mode
+    import model_utils
+    model_utils.get_dlib_detector()
+    if mode == "pro":
+        model_utils.get_face_cascade()
+        model_utils.get_emotion_model()
+
+
+def chunk_ranges(frame_count, fps, chunk_seconds=BATCH_CHUNK_SECONDS, analysis_fps=BATCH_ANALYSIS_FPS):
+    # Returns (stride, [(start, end), ...]); end is None for an unknown length.
+    # Chunk starts are multiples of the analysis stride, so every chunk
+    # analyses the same frames one long run would; the last chunk may be short.
+    stride = max(1, round(fps / analysis_fps))
+    if frame_count <= 0:  # unknown length (some containers): one chunk to the end
+        return stride, [(0, None)]
+    step = stride * max(1, math.ceil(chunk_seconds * fps / stride))
+    return stride, [(start, min(start + step, frame_count)) for start in range(0, frame_count, step)]
+
+
+def plan_chunks(path, chunk_seconds=BATCH_CHUNK_SECONDS, analysis_fps=BATCH_ANALYSIS_FPS):
+    # Returns (fps, frame_count, jobs)
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    stride, ranges = chunk_ranges(frame_count, fps, chunk_seconds, analysis_fps)
+    return fps, frame_count, [(path, start, end, fps, stride) for start, end in ranges]
+
+
+def analyze_chunk(job):
+    path, start, end, fps, stride = job
+    estimator = make_estimator(_worker_mode, parallel=False)  # the pool already keeps every core busy
+    alerts = AlertTracker()
+    # Warm-up: the analysed frames just before the chunk (the previous chunk's
+    # last ones) rebuild the eye counter and face track; their verdicts are dropped
+    warm_start = max(0, start - EYE_AR_CONSEC_FRAMES * stride)
+
+    cap = cv2.VideoCapture(path)
+    if warm_start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, warm_start)
+    index = warm_start
+    analysed = 0
+    try:
+        while end is None or index < end:
+            if (index - warm_start) % stride == 0:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if index == start and warm_start < start:
+                    estimator.focused_seconds = estimator.distracted_seconds = estimator.drowsy_seconds = 0
+                timestamp = index / fps  # media time
+                result = estimator.process_frame(frame, timestamp)
+                if index >= start:
+                    alerts.update(result, timestamp)
+                    analysed += 1
+            elif not cap.grab():  # skipped frames are not decoded
+                break
+            index += 1
+    finally:
+        cap.release()
+
+    return {
+        "path": path,
+        "start": start,
+        "end": index,
+        "analysed": analysed,
+        "focused_seconds": estimator.focused_seconds,
+        "distracted_seconds": estimator.distracted_seconds,
+        "drowsy_seconds": estimator.drowsy_seconds,
+        "alert_events": alerts.events,
+    }
+
+
+def merge_file(path, fps, frame_count, chunks, username):
+    chunks = sorted(chunks, key=lambda c: c["start"])
+    frames = frame_count if frame_count > 0 else max(c["end"] for c in chunks)
+    alerts, alerts_by_kind = merge_alert_events([c["alert_events"] for c in chunks])
+
+    # The recording finished when the file was last written
+    end_time = datetime.fromtimestamp(os.path.getmtime(path))
+    start_time = end_time - timedelta(seconds=frames / fps)
+    return {
+        "username": username,
+        "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "end_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "focused_seconds": int(sum(c["focused_seconds"] for c in chunks)),
+        "distracted_seconds": int(sum(c["distracted_seconds"] for c in chunks)),
+        "drowsy_seconds": int(sum(c["drowsy_seconds"] for c in chunks)),
+        "alerts": alerts,
+        # Not stored in the sessions table, only reported
+        "file": path,
+        "analysed_frames": sum(c["analysed"] for c in chunks),
+        "alerts_by_kind": alerts_by_kind,
+    }
+
+
+def run_batch(paths, mode="normal", workers=None, chunk_seconds=BATCH_CHUNK_SECONDS,
+              analysis_fps=BATCH_ANALYSIS_FPS, username="pundra_student"):
+    # Returns (sessions, skipped): skipped is [(path, reason)] for files that can't be read
+    plans = {}
+    jobs = []
+    skipped = []
+    for path in paths:
+        try:
+            fps, frame_count, file_jobs = plan_chunks(path, chunk_seconds, analysis_fps)
+        except IOError as e:
+            skipped.append((path, str(e)))
+            continue
+        plans[path] = (fps, frame_count)
+        jobs.extend(file_jobs)
+
+    results = {path: [] for path in plans}
+    # spawn: workers start clean instead of inheriting the parent's threads / TF state
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(mode,)) as pool:
+        for done, chunk in enumerate(pool.imap_unordered(analyze_chunk, jobs), 1):
+            results[chunk["path"]].append(chunk)
+            print(f"[{done}/{len(jobs)}] {os.path.basename(chunk['path'])} frames {chunk['start']}-{chunk['end']}")
+
+    sessions = [merge_file(path, *plans[path], results[path], username) for path in plans]
+    return sessions, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse recorded study videos offline")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--mode", choices=["normal", "pro"], default="normal")
+    parser.add_argument("--workers", type=int, help="pool size (default: all cores)")
+    parser.add_argument("--chunk-seconds", type=float, default=BATCH_CHUNK_SECONDS)
+    parser.add_argument("--analysis-fps", type=float, default=BATCH_ANALYSIS_FPS)
+    parser.add_argument("--username", default="pundra_student")
+    parser.add_argument("--no-db", action="store_true", help="don't write the sessions table")
+    parser.add_argument("--json", help="also write the per-file results here")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    sessions, skipped = run_batch(args.videos, args.mode, args.workers, args.chunk_seconds,
+                         args.analysis_fps, args.username)
+    elapsed = time.perf_counter() - started
+
+    for s in sessions:
+        print(f"{s['file']}: focused {s['focused_seconds']}s, distracted {s['distracted_seconds']}s, "
+              f"drowsy {s['drowsy_seconds']}s, alerts {s['alerts']}")
+    for path, reason in skipped:
+        print(f"{path}: skipped ({reason})")
+    print(f"{len(sessions)} recordings in {elapsed:.1f}s" + (f", {len(skipped)} skipped" if skipped else ""))
+
+    if sessions and not args.no_db:
+        db.init_db()
+        db.insert_sessions(sessions)
+        print(f"Saved {len(sessions)} sessions to {db.DB_FILE}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(sessions, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
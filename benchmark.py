@@ -0,0 +1,303 @@
+"""Replay fixture clips or synthetic frames through the estimators, no camera needed.
+
+    python benchmark.py --synthetic 300 --modes normal pro --out bench.json
+    python benchmark.py --video fixtures/desk.mp4 --memory --compare bench.json
+    python benchmark.py --pipeline synthetic --seconds 30
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+from profiling import StageProfiler, LatencyHistogram, GcMonitor
+from session import make_estimator
+from video_source import FileSource, ImageDirSource, SyntheticSource
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+
+# --- Memory ---
+
+class _MemoryTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.carry_peak()
+        tracemalloc.reset_peak()
+        self.start = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        peak = tracemalloc.get_traced_memory()[1] - self.start
+        if peak > self.profiler.peak_bytes.get(self.name, 0):
+            self.profiler.peak_bytes[self.name] = peak
+        return False
+
+
+class MemoryStageProfiler(StageProfiler):
+    # Peak traced allocation inside each stage (tracemalloc must be running).
+    # Much slower than timing alone, so it runs as a separate pass.
+    # tracemalloc's peak is process-wide: a stage's number only means something
+    # if nothing else allocates meanwhile, so stages must run one at a time on
+    # one thread (run_memory uses sequential Pro branches, no pipeline threads).
+    def __init__(self):
+        super().__init__()
+        self.peak_bytes = {}
+        self.carried_peak = 0  # highest peak seen before a stage reset it
+
+    def carry_peak(self):
+        self.carried_peak = max(self.carried_peak, tracemalloc.get_traced_memory()[1])
+
+    def stage(self, name):
+        return _MemoryTimer(self, name)
+
+
+# --- Runs ---
+
+def run_timing(mode, frames, draw=False):
+    profiler = StageProfiler()
+    estimator = make_estimator(mode, profiler)
+    total = LatencyHistogram()
+
+    count = 0
+    gc_monitor = GcMonitor(profiler).start()
+    started = time.perf_counter()
+    try:
+        for timestamp, frame in frames:
+            t0 = time.perf_counter()
+            result = estimator.process_frame(frame, timestamp)
+            if draw:
+                estimator.draw(frame, result)
+            total.record(time.perf_counter() - t0)
+            count += 1
+    finally:
+        gc_monitor.stop()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "frames": count,
+        "seconds": round(elapsed, 3),
+        "fps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(total.mean * 1000, 2),
+            "p50": round(total.percentile(50) * 1000, 2),
+            "p90": round(total.percentile(90) * 1000, 2),
+            "p99": round(total.percentile(99) * 1000, 2),
+            "max": round(total.max * 1000, 2),
+        },
+        "stages": profiler.summary(),
+        "allocations": profiler.counters(),
+        "counters": {
+            "focused_seconds": round(estimator.focused_seconds, 2),
+            "distracted_seconds": round(estimator.distracted_seconds, 2),
+            "drowsy_seconds": round(estimator.drowsy_seconds, 2),
+        },
+    }
+
+
+def run_memory(mode, frames):
+    profiler = MemoryStageProfiler()
+    # Sequential branches: with the emotion branch on the pool, stages overlap
+    # and the process-wide peak can't be split between them.
+    # Model loading is outside the traced window.
+    estimator = make_estimator(mode, profiler, parallel=False)
+    tracemalloc.start()
+    try:
+        frame_peak = 0
+        for timestamp, frame in frames:
+            tracemalloc.reset_peak()
+            profiler.carried_peak = 0
+            start = tracemalloc.get_traced_memory()[0]
+            estimator.process_frame(frame, timestamp)
+            # Stages reset the peak as they start; take the highest seen over the whole frame
+            profiler.carry_peak()
+            frame_peak = max(frame_peak, profiler.carried_peak - start)
+    finally:
+        tracemalloc.stop()
+    return {
+        "process_frame_peak_kb": round(frame_peak / 1024, 1),
+        "stage_peak_kb": {name: round(b / 1024, 1) for name, b in profiler.peak_bytes.items()},
+    }
+
+
+def run_micro(repeats=20000, batch=4096):
+    # landmark_features on random 68-point shapes: per face (live path) and batched (replay)
+    from landmark_features import landmark_features
+    shapes = np.random.default_rng(0).integers(0, 480, (batch, 68, 2))
+    t0 = time.perf_counter()
+    for i in range(repeats):
+        landmark_features(shapes[i % batch])
+    single = (time.perf_counter() - t0) / repeats
+    t0 = time.perf_counter()
+    landmark_features(shapes)
+    batched = (time.perf_counter() - t0) / batch
+    return {"per_face_us": round(single * 1e6, 3), "batched_per_face_us": round(batched * 1e6, 3)}
+
+
+def run_pipeline(mode, source_spec, seconds):
+    # Full live pipeline (capture thread + scheduler + analysis worker) on a
+    # source played in real time, e.g. "synthetic" or "file:clip.mp4"
+    from capture import CapturePipeline
+    from video_source import open_source
+
+    source = open_source(source_spec, realtime=True, loop=True)
+    if source is None:
+        raise IOError(f"Cannot open video source: {source_spec}")
+    profiler = StageProfiler()
+    pipeline = CapturePipeline(source, make_estimator(mode, profiler), profiler=profiler)
+    pipeline.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        pipeline.stop()
+        source.release()
+    return {
+        "seconds": seconds,
+        "captured": pipeline.grabber.frame_count,
+        "decoded": pipeline.grabber.decoded_count,
+        "analysed": pipeline.worker.processed,
+        "dropped": pipeline.queue.dropped,
+        "camera_fps": round(pipeline.scheduler.camera_fps, 2),
+        "analysis_fps": round(pipeline.worker.processed / seconds, 2),
+        "latency_ms": round(pipeline.latency * 1000, 2),
+        "stages": profiler.summary(),
+    }
+
+
+def frame_source(args, spec):
+    # Sources are replayed as fast as possible; timestamps are media time
+    kind, value = spec
+    if kind == "synthetic":
+        face = cv2.imread(args.face) if args.face else None
+        return lambda: SyntheticSource(value, args.width, args.height, args.fps, realtime=False, face=face)
+    if kind == "dir":
+        return lambda: ImageDirSource(value, args.fps, realtime=False)
+    return lambda: _limited(FileSource(value, realtime=False), args.limit)
+
+
+def _limited(source, limit):
+    if not source.is_opened():
+        raise IOError(f"Cannot open fixture video: {source.path}")
+    try:
+        for i, item in enumerate(source):
+            if limit is not None and i >= limit:
+                break
+            yield item
+    finally:
+        source.release()
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["mode"], r["source"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}")
+    for r in results:
+        old = baseline.get((r["mode"], r["source"]))
+        if old is None or "fps" not in r or "fps" not in old:
+            continue
+        change = (r["fps"] - old["fps"]) / old["fps"] * 100 if old["fps"] else 0.0
+        print(f"  {r['mode']:<7}{r['source']:<28}{old['fps']:8.1f} -> {r['fps']:8.1f} fps ({change:+.1f}%)"
+              f"   p99 {old['latency_ms']['p99']:.1f} -> {r['latency_ms']['p99']:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FocusEstimator / ProEstimator without a camera")
+    parser.add_argument("--modes", nargs="+", default=["normal"], choices=["normal", "pro"])
+    parser.add_argument("--video", nargs="*", default=[], help="fixture clips to replay")
+    parser.add_argument("--images", nargs="*", default=[], help="directories of frames to replay")
+    parser.add_argument("--synthetic", type=int, default=0, help="number of synthetic frames")
+    parser.add_argument("--face", help="BGR image pasted into synthetic frames")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--limit", type=int, help="max frames per clip")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate of synthetic / image sources")
+    parser.add_argument("--draw", action="store_true", help="annotate every frame, as the live preview would")
+    parser.add_argument("--memory", action="store_true", help="extra tracemalloc pass for peak memory")
+    parser.add_argument("--pipeline", metavar="SOURCE",
+                        help="also run the live capture pipeline on a real-time source (e.g. synthetic, file:clip.mp4)")
+    parser.add_argument("--seconds", type=float, default=20.0, help="duration of the --pipeline run")
+    parser.add_argument("--micro", action="store_true", help="also time landmark feature extraction")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier --out file to compare against")
+    args = parser.parse_args(argv)
+
+    sources = [("video", path) for path in args.video] + [("dir", path) for path in args.images]
+    if args.synthetic or not sources:
+        sources.append(("synthetic", args.synthetic or 300))
+
+    results = []
+    for mode in args.modes:
+        for spec in sources:
+            name = f"synthetic:{spec[1]}" if spec[0] == "synthetic" else os.path.basename(os.path.normpath(spec[1]))
+            make_frames = frame_source(args, spec)
+            result = {"mode": mode, "source": name}
+            try:
+                result.update(run_timing(mode, make_frames(), args.draw))
+                if args.memory:
+                    result["memory"] = run_memory(mode, make_frames())
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            results.append(result)
+
+            if "error" in result:
+                print(f"{mode:<7}{name:<28}FAILED  {result['error']}")
+            else:
+                lat = result["latency_ms"]
+                print(f"{mode:<7}{name:<28}{result['fps']:8.1f} fps   "
+                      f"p50 {lat['p50']:.1f} ms   p99 {lat['p99']:.1f} ms")
+
+        if args.pipeline:
+            try:
+                live = {"mode": mode, "source": f"pipeline:{args.pipeline}",
+                        "pipeline": run_pipeline(mode, args.pipeline, args.seconds)}
+                print(f"{mode:<7}{'pipeline':<28}{live['pipeline']['analysis_fps']:8.1f} analysed/s   "
+                      f"latency {live['pipeline']['latency_ms']:.1f} ms   dropped {live['pipeline']['dropped']}")
+            except Exception as e:
+                live = {"mode": mode, "source": f"pipeline:{args.pipeline}", "error": f"{type(e).__name__}: {e}"}
+                print(f"{mode:<7}{'pipeline':<28}FAILED  {live['error']}")
+            results.append(live)
+
+    if args.micro:
+        try:
+            micro = {"mode": "-", "source": "micro", "micro": run_micro()}
+        except Exception as e:
+            micro = {"mode": "-", "source": "micro", "error": f"{type(e).__name__}: {e}"}
+        results.append(micro)
+        print(f"{'-':<7}{'micro':<28}{micro.get('micro', micro.get('error'))}")
+
+    report = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "opencv": cv2.__version__,
+            # ru_maxrss is KiB on Linux, bytes on macOS; not available on Windows
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import numpy as np
+from profiling import NULL_PROFILER
+
+
+class FrameBuffers:
+    # Named scratch arrays reused from frame to frame (OpenCV dst= outputs,
+    # in-place NumPy ops). A buffer is only (re)created when its shape or dtype
+    # changes; each time that happens it is counted as "alloc:<name>" on the
+    # profiler, so after the first frame the counters should stay flat.
+    # Not thread-safe: one instance per estimator / thread.
+    def __init__(self, profiler=None):
+        self.profiler = profiler or NULL_PROFILER
+        self._buffers = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype)
+            self.allocations += 1
+            self.profiler.count("alloc:" + name)
+        return buf
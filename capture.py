@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+from config import ANALYSIS_QUEUE_SIZE, PREVIEW_FPS
+from scheduler import AdaptiveScheduler
+from profiling import NULL_PROFILER
+
+
+class DropOldestQueue:
+    # Bounded FIFO: when full, a new item pushes out the oldest one
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class LatestValue:
+    # Single slot that only ever holds the newest value, with a sequence number
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self.seq = 0
+
+    def set(self, value):
+        with self._cond:
+            self._value = value
+            self.seq += 1
+            self._cond.notify_all()
+
+    def get(self):
+        with self._cond:
+            return self.seq, self._value
+
+    def wait_newer(self, seq, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != seq, timeout)
+            return self.seq, self._value
+
+
+class FrameGrabber(threading.Thread):
+    # Reads the video source as fast as it delivers so the driver buffer never
+    # fills up. Every frame is grab()bed, but only frames that will be analysed
+    # or shown are retrieve()d (decoded), flipped and handed on. Frames are
+    # shown at preview_fps (0 = never) whatever the analysis rate, each with
+    # the newest verdict so far.
+    def __init__(self, source, analysis_queue, scheduler, display, verdict, preview_fps=PREVIEW_FPS,
+                 profiler=NULL_PROFILER):
+        super().__init__(daemon=True)
+        self.source = source
+        self.profiler = profiler
+        self.analysis_queue = analysis_queue
+        self.scheduler = scheduler
+        self.display = display  # (timestamp, frame, result)
+        self.verdict = verdict  # newest FrameResult, from the analysis thread
+        self.preview_interval = 1.0 / preview_fps if preview_fps > 0 else None
+        self._last_shown = None
+        self.frame_count = 0
+        self.decoded_count = 0
+        self.failed = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            with self.profiler.stage("grab"):
+                grabbed = self.source.grab()
+            if not grabbed:
+                self.failed = True
+                break
+
+            timestamp = self.source.timestamp
+            self.frame_count += 1
+            self.scheduler.record_frame(timestamp)
+
+            analyze = self.scheduler.should_analyze(timestamp)
+            show = self._preview_due(timestamp)
+            if not (analyze or show):
+                continue
+
+            with self.profiler.stage("decode"):
+                ret, frame = self.source.retrieve()
+                if ret:
+                    cv2.flip(frame, 1, dst=frame)  # in place: retrieve() hands out a fresh array
+            if not ret:
+                self.failed = True
+                break
+            self.decoded_count += 1
+
+            if analyze:
+                self.analysis_queue.put((timestamp, frame))
+            if show:
+                self.display.set((timestamp, frame, self.verdict.get()[1]))
+
+    def _preview_due(self, timestamp):
+        if self.preview_interval is None:
+            return False
+        # Same half-frame slack as the scheduler
+        slack = (self.scheduler.frame_interval or 0.0) / 2
+        if self._last_shown is None or timestamp - self._last_shown >= self.preview_interval - slack:
+            self._last_shown = timestamp
+            return True
+        return False
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class AnalysisWorker(threading.Thread):
+    # Runs the estimator on the newest queued frame whenever it is free
+    def __init__(self, estimator, analysis_queue, scheduler, verdict, profiler=NULL_PROFILER, sinks=()):
+        super().__init__(daemon=True)
+        self.estimator = estimator
+        # Objects with append(result) fed every FrameResult on this thread,
+        # e.g. recorder.LandmarkRecorder, timeline.TimelineWriter
+        self.sinks = tuple(sinks)
+        self.profiler = profiler
+        self.analysis_queue = analysis_queue
+        self.scheduler = scheduler
+        self.verdict = verdict
+        self.latency = 0.0  # camera timestamp -> verdict ready, in seconds
+        self.processed = 0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            item = self.analysis_queue.get(timeout=0.1)
+            if item is None:
+                continue
+
+            timestamp, frame = item
+            started = time.monotonic()
+            try:
+                # process_frame leaves the frame untouched; the UI draws the
+                # result onto the frames it actually shows
+                result = self.estimator.process_frame(frame, timestamp)
+            except Exception as e:
+                self.error = e
+                break
+
+            finished = time.monotonic()
+            self.profiler.record("process_frame", finished - started)
+            self.scheduler.record_latency(finished - started)
+            self.scheduler.idle = result.idle
+            self.latency = finished - timestamp
+            self.processed += 1
+            self.verdict.set(result)
+
+            if self.sinks:
+                try:
+                    with self.profiler.stage("record"):
+                        for sink in self.sinks:
+                            sink.append(result)
+                except Exception as e:
+                    self.error = e
+                    break
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class CapturePipeline:
+    # Capture thread -> scheduler -> drop-oldest queue -> analysis thread
+    # `source` is a video_source.VideoSource (camera, file, image dir, synthetic)
+    def __init__(self, source, estimator, scheduler=None, queue_size=ANALYSIS_QUEUE_SIZE, profiler=NULL_PROFILER,
+                 sinks=(), preview_fps=PREVIEW_FPS):
+        self.source = source
+        self.estimator = estimator
+        self.profiler = profiler
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.queue = DropOldestQueue(queue_size)
+        self.display = LatestValue()  # newest frame to show: (timestamp, frame, newest result or None)
+        self.verdict = LatestValue()  # newest FrameResult
+        self.grabber = FrameGrabber(source, self.queue, self.scheduler, self.display, self.verdict, preview_fps,
+                                    profiler)
+        self.worker = AnalysisWorker(estimator, self.queue, self.scheduler, self.verdict, profiler, sinks)
+
+    def start(self):
+        self.grabber.start()
+        self.worker.start()
+
+    def stop(self, timeout=2.0):
+        # True once both threads have exited. Sinks may only be closed after
+        # that: a worker still inside process_frame will append to them.
+        self.grabber.stop()
+        self.worker.stop()
+        self.queue.close()
+        self.grabber.join(timeout)
+        self.worker.join(timeout)
+        return not (self.grabber.is_alive() or self.worker.is_alive())
+
+    @property
+    def failed(self):
+        return self.grabber.failed
+
+    @property
+    def error(self):
+        return self.worker.error
+
+    @property
+    def latency(self):
+        return self.worker.latency
+
+    def wait_for_frame(self, seq, timeout=1.0):
+        return self.display.wait_newer(seq, timeout)
@@ -6,10 +6,86 @@ CLASS_NAMES = ["focused", "distracted", "drowsy"]
 EYE_AR_THRESH = 0.22   # likely closed
 EYE_AR_CONSEC_FRAMES = 6  # drowsy
 MOUTH_AR_THRESH = 0.6  # yawn
+POSTURE_MAX_DEVIATION = 40  # px between nose tip and chin x before the head counts as turned
+ALERT_COOLDOWN = 5  # seconds before the same alert type is counted again
+POMODORO_MINUTES = 25
+POMODORO_BREAK_MINUTES = 5
 
 # Emotions from FER2013 model
 EMOTION_CLASSES = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
 
 # Which emotions to count as "distracted"
 DISTRACTED_EMOTIONS = {"Angry", "Disgust", "Fear", "Sad", "Surprise"}
-FOCUSED_EMOTIONS = {"Happy", "Neutral"}
\ No newline at end of file
+FOCUSED_EMOTIONS = {"Happy", "Neutral"}
+
+# Emotion model inference
+EMOTION_MODEL_PATH = "fer_model.h5"
+EMOTION_BACKEND = "keras"  # "keras", "tflite", "onnx" or "auto" (fastest installed)
+EMOTION_QUANTIZE = False  # int8 weights for the tflite / onnx backends
+# Run landmark and emotion work of a Pro frame concurrently. Lower latency, but the
+# FER crop is then the bare dlib rectangle (landmarks aren't ready yet), not the
+# landmark-hull crop every other entry point uses, so verdicts can differ slightly.
+PRO_PARALLEL_BRANCHES = False
+PRO_BRANCH_WORKERS = 2  # threads shared by all Pro sessions for the emotion branch
+
+# Capture / analysis pipeline
+VIDEO_SOURCE = "camera"  # "camera[:index]", "file:<path>", "dir:<path>" or "synthetic[:count]"
+CAMERA_INDEX = 0
+CAPTURE_WIDTH = 640  # HOG (no upsampling) needs faces >= ~80 px; 640x480 is plenty at desk distance
+CAPTURE_HEIGHT = 480
+CAPTURE_FPS = 30
+CAPTURE_FOURCC = "MJPG"  # compressed: frames that are only grabbed are never JPEG-decoded
+ANALYSIS_QUEUE_SIZE = 1  # frames waiting for analysis (oldest dropped when full)
+ANALYSIS_CPU_BUDGET = 0.5  # share of one core the analysis worker may use
+ANALYSIS_MAX_FPS = 15  # never analyse more often than this
+ANALYSIS_MIN_FPS = 1  # ...or less often than this, even over budget
+MAX_FRAME_GAP = 2.0  # longest wall-clock gap (s) one analysed frame may account for
+
+# Low-power mode while nobody is at the desk (presence.py)
+PRESENCE_IDLE_AFTER = 20.0  # seconds without a face before the detectors are paused
+PRESENCE_IDLE_FPS = 2  # checks per second while idle; keep above 1 / MAX_FRAME_GAP so away time is fully counted
+PRESENCE_THUMB_SIZE = (64, 48)  # motion check compares grayscale thumbnails of this size
+PRESENCE_MOTION_THRESH = 6.0  # mean absolute thumbnail difference (0-255) that counts as motion
+PRESENCE_PROBE_SECONDS = 5.0  # run the face detector at least this often while idle, motion or not
+
+# Live preview (what is pushed to the browser)
+PREVIEW_FPS = 10  # video panel updates per second
+PREVIEW_WIDTH = 480  # frames are downscaled to this width before JPEG encoding
+PREVIEW_JPEG_QUALITY = 75
+STATS_MIN_INTERVAL = 0.5  # counters / progress bar are rewritten at most this often (s)
+
+# Hot-path profiling (per-stage latency histograms, see profiling.py)
+PROFILING = True
+PROFILE_DIR = "profiles"  # stage timings are dumped here at session end (None = don't dump)
+
+# Face tracking between detections
+FACE_TRACKING = True  # False = run the HOG detector on every analysed frame
+FACE_DETECT_EVERY_N = 10  # full detection at least every N analysed frames
+FACE_TRACK_MIN_QUALITY = 7.0  # correlation tracker confidence (PSR) below this = track lost
+FACE_SEARCH_MARGIN = 0.5  # re-detect first in the last box grown by this fraction per side
+
+# Offline batch analysis (batch_analyze.py)
+BATCH_ANALYSIS_FPS = 5  # frames analysed per second of video
+BATCH_CHUNK_SECONDS = 300  # recordings are split into chunks of this length across the pool
+
+# Per-frame landmark recording (recorder.py), opt-in
+RECORD_LANDMARKS = False
+RECORDINGS_DIR = "recordings"  # one directory per session, linked from the sessions table
+RECORD_CHUNK_ROWS = 18000  # rows per memory-mapped chunk file (30 min at 10 fps, ~6 MB)
+RECORD_META_EVERY = 300  # meta.json row count is rewritten this often (30 s at 10 fps): at most this many rows lost on a crash
+
+# Per-second focus timeline (timeline.py -> timeline table)
+TIMELINE = True
+TIMELINE_FLUSH_SECONDS = 5  # background writer commits buffered seconds this often
+
+# Dashboard
+DASHBOARD_PAGE_SIZE = 50  # sessions per page of raw data
+
+# Multi-stream server (stream_server.py)
+SERVER_TICK_FPS = 5  # analysis ticks per second; one batched emotion call per tick
+SERVER_WORKERS = 4  # threads for the per-stream landmark work within a tick
+
+# Live server (live_server.py): MJPEG video + server-sent events
+LIVE_SERVER_HOST = "127.0.0.1"
+LIVE_SERVER_PORT = 8765
+LIVE_STATS_INTERVAL = 1.0  # seconds between "stats" events
@@ -1,5 +1,6 @@
 import sqlite3
 import os
+import threading
 
 # Database file path
 DB_FILE = "study_sessions.db"
@@ -13,35 +14,297 @@ CREATE TABLE IF NOT EXISTS sessions (
     focused_seconds INTEGER,
     distracted_seconds INTEGER,
     drowsy_seconds INTEGER,
-    alerts INTEGER
+    alerts INTEGER,
+    recording TEXT
 )
 '''
 
+# One row per second of a live session (timeline.py). The primary key is the
+# (session, time) index; rows arrive in key order, so inserts are B-tree appends.
+CREATE_TIMELINE_SQL = '''
+CREATE TABLE IF NOT EXISTS timeline (
+    session_id INTEGER NOT NULL,
+    second INTEGER NOT NULL,
+    state INTEGER NOT NULL,
+    ear REAL,
+    mar REAL,
+    emotion TEXT,
+    alert_flags INTEGER NOT NULL,
+    PRIMARY KEY (session_id, second)
+) WITHOUT ROWID
+'''
+
+# Dashboard rollups, kept up to date by every insert_session(s) / end_session
+# so the dashboard never scans the sessions table. focus_percent_sum /
+# focus_sessions is the mean of the per-session focus % (sessions with time only).
+CREATE_ROLLUPS_SQL = ['''
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    username TEXT NOT NULL,
+    day TEXT NOT NULL,
+    sessions INTEGER NOT NULL,
+    focused_seconds INTEGER NOT NULL,
+    distracted_seconds INTEGER NOT NULL,
+    drowsy_seconds INTEGER NOT NULL,
+    alerts INTEGER NOT NULL,
+    focus_percent_sum REAL NOT NULL,
+    focus_sessions INTEGER NOT NULL,
+    PRIMARY KEY (username, day)
+) WITHOUT ROWID
+''', '''
+CREATE TABLE IF NOT EXISTS user_rollup (
+    username TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL,
+    focused_seconds INTEGER NOT NULL,
+    distracted_seconds INTEGER NOT NULL,
+    drowsy_seconds INTEGER NOT NULL,
+    alerts INTEGER NOT NULL,
+    focus_percent_sum REAL NOT NULL,
+    focus_sessions INTEGER NOT NULL,
+    first_start TEXT,
+    last_start TEXT
+)
+''']
+
+CREATE_INDEXES_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions(start_time)',
+    'CREATE INDEX IF NOT EXISTS idx_sessions_user_start ON sessions(username, start_time)',
+    'CREATE INDEX IF NOT EXISTS idx_daily_rollup_day ON daily_rollup(day)',
+]
+
+# Columns added after the first release: (name, type), applied to older databases by init_db
+MIGRATIONS = [
+    ("recording", "TEXT"),  # directory of the session's landmark recording (recorder.py), or NULL
+]
+
+# --- Connection ---
+# One long-lived WAL-mode connection per process, shared by all Streamlit
+# sessions (calls are serialised). WAL lets the timeline writer commit while
+# the dashboard reads. Background writers open their own with connect().
+_conn = None
+_conn_lock = threading.RLock()
+
+def connect():
+    conn = sqlite3.connect(DB_FILE, timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')  # durable at checkpoints; fine for study stats
+    return conn
+
+def get_connection():
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            _conn = connect()
+        return _conn
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(CREATE_SQL)
-    conn.commit()
-    conn.close()
+    with _conn_lock:
+        conn = get_connection()
+        with conn:
+            conn.execute(CREATE_SQL)
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(sessions)')}
+            for name, sql_type in MIGRATIONS:
+                if name not in existing:
+                    conn.execute(f'ALTER TABLE sessions ADD COLUMN {name} {sql_type}')
+            conn.execute(CREATE_TIMELINE_SQL)
+            new_rollups = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='user_rollup'"
+            ).fetchone()[0] == 0
+            for sql in CREATE_ROLLUPS_SQL + CREATE_INDEXES_SQL:
+                conn.execute(sql)
+            if new_rollups:  # databases from before the rollups: fill them once
+                rebuild_rollups(conn)
+
+# --- Rollups ---
+
+def _focus_percent(r):
+    total = r['focused_seconds'] + r['distracted_seconds'] + r['drowsy_seconds']
+    return r['focused_seconds'] / total * 100 if total else None
+
+def _add_to_rollups(conn, records):
+    # Same transaction as the session rows themselves
+    rows = []
+    for r in records:
+        pct = _focus_percent(r)
+        rows.append((r['username'], r['start_time'], r['focused_seconds'], r['distracted_seconds'],
+                     r['drowsy_seconds'], r['alerts'], pct or 0.0, int(pct is not None)))
+    conn.executemany('''INSERT INTO daily_rollup(username, day, sessions, focused_seconds, distracted_seconds, drowsy_seconds,
+                                                 alerts, focus_percent_sum, focus_sessions)
+                        VALUES (?1, date(?2), 1, ?3, ?4, ?5, ?6, ?7, ?8)
+                        ON CONFLICT(username, day) DO UPDATE SET
+                            sessions = sessions + 1,
+                            focused_seconds = focused_seconds + excluded.focused_seconds,
+                            distracted_seconds = distracted_seconds + excluded.distracted_seconds,
+                            drowsy_seconds = drowsy_seconds + excluded.drowsy_seconds,
+                            alerts = alerts + excluded.alerts,
+                            focus_percent_sum = focus_percent_sum + excluded.focus_percent_sum,
+                            focus_sessions = focus_sessions + excluded.focus_sessions''', rows)
+    conn.executemany('''INSERT INTO user_rollup(username, sessions, focused_seconds, distracted_seconds, drowsy_seconds,
+                                                alerts, focus_percent_sum, focus_sessions, first_start, last_start)
+                        VALUES (?1, 1, ?3, ?4, ?5, ?6, ?7, ?8, ?2, ?2)
+                        ON CONFLICT(username) DO UPDATE SET
+                            sessions = sessions + 1,
+                            focused_seconds = focused_seconds + excluded.focused_seconds,
+                            distracted_seconds = distracted_seconds + excluded.distracted_seconds,
+                            drowsy_seconds = drowsy_seconds + excluded.drowsy_seconds,
+                            alerts = alerts + excluded.alerts,
+                            focus_percent_sum = focus_percent_sum + excluded.focus_percent_sum,
+                            focus_sessions = focus_sessions + excluded.focus_sessions,
+                            first_start = MIN(first_start, excluded.first_start),
+                            last_start = MAX(last_start, excluded.last_start)''', rows)
+
+def rebuild_rollups(conn=None):
+    # Recomputes both rollups from the sessions table (one full scan)
+    if conn is None:
+        with _conn_lock:
+            conn = get_connection()
+            with conn:
+                return rebuild_rollups(conn)
+    totals = '''COUNT(*), SUM(focused_seconds), SUM(distracted_seconds), SUM(drowsy_seconds), SUM(alerts),
+                SUM(CASE WHEN t > 0 THEN focused_seconds * 100.0 / t ELSE 0 END), SUM(t > 0)'''
+    completed = '''(SELECT *, focused_seconds + distracted_seconds + drowsy_seconds AS t
+                    FROM sessions WHERE end_time IS NOT NULL)'''
+    conn.execute('DELETE FROM daily_rollup')
+    conn.execute('DELETE FROM user_rollup')
+    conn.execute(f'INSERT INTO daily_rollup SELECT username, date(start_time), {totals} '
+                 f'FROM {completed} GROUP BY username, date(start_time)')
+    conn.execute(f'INSERT INTO user_rollup SELECT username, {totals}, MIN(start_time), MAX(start_time) '
+                 f'FROM {completed} GROUP BY username')
 
 def insert_session(record: dict):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''INSERT INTO sessions(username, start_time, end_time, focused_seconds, distracted_seconds, drowsy_seconds, alerts)
-                 VALUES (?,?,?,?,?,?,?)''',
-              (record['username'], record['start_time'], record['end_time'],
-               record['focused_seconds'], record['distracted_seconds'], record['drowsy_seconds'], record['alerts']))
-    conn.commit()
-    conn.close()
+    with _conn_lock:
+        conn = get_connection()
+        with conn:
+            cur = conn.execute('''INSERT INTO sessions(username, start_time, end_time, focused_seconds, distracted_seconds, drowsy_seconds, alerts, recording)
+                                  VALUES (?,?,?,?,?,?,?,?)''',
+                               (record['username'], record['start_time'], record['end_time'],
+                                record['focused_seconds'], record['distracted_seconds'], record['drowsy_seconds'], record['alerts'],
+                                record.get('recording')))
+            _add_to_rollups(conn, [record])
+        return cur.lastrowid
+
+def insert_sessions(records):
+    # Many sessions in one transaction (batch analysis)
+    with _conn_lock:
+        conn = get_connection()
+        with conn:
+            conn.executemany('''INSERT INTO sessions(username, start_time, end_time, focused_seconds, distracted_seconds, drowsy_seconds, alerts, recording)
+                                VALUES (?,?,?,?,?,?,?,?)''',
+                             [(r['username'], r['start_time'], r['end_time'],
+                               r['focused_seconds'], r['distracted_seconds'], r['drowsy_seconds'], r['alerts'],
+                               r.get('recording'))
+                              for r in records])
+            _add_to_rollups(conn, records)
+
+def begin_session(username, start_time):
+    # Live sessions get their row (and id) up front, so timeline rows can point
+    # at it; end_session fills in the totals. Rows without an end_time are
+    # sessions still running (or never stopped) and are left out of fetch_all.
+    with _conn_lock:
+        conn = get_connection()
+        with conn:
+            cur = conn.execute('INSERT INTO sessions(username, start_time) VALUES (?,?)', (username, start_time))
+        return cur.lastrowid
+
+def end_session(session_id, record: dict):
+    with _conn_lock:
+        conn = get_connection()
+        with conn:
+            conn.execute('''UPDATE sessions SET end_time=?, focused_seconds=?, distracted_seconds=?, drowsy_seconds=?,
+                                                alerts=?, recording=?
+                            WHERE id=?''',
+                         (record['end_time'], record['focused_seconds'], record['distracted_seconds'],
+                          record['drowsy_seconds'], record['alerts'], record.get('recording'), session_id))
+            _add_to_rollups(conn, [record])
+
+def discard_session(session_id):
+    # Drops a begun session that never got going (its row and any timeline rows);
+    # it was never added to the rollups
+    with _conn_lock:
+        conn = get_connection()
+        with conn:
+            conn.execute('DELETE FROM timeline WHERE session_id=?', (session_id,))
+            conn.execute('DELETE FROM sessions WHERE id=? AND end_time IS NULL', (session_id,))
+
+def insert_timeline(rows, conn=None):
+    # rows: (session_id, second, state, ear, mar, emotion, alert_flags), one transaction
+    if conn is None:
+        with _conn_lock:
+            return insert_timeline(rows, get_connection())
+    with conn:
+        conn.executemany('''INSERT OR REPLACE INTO timeline(session_id, second, state, ear, mar, emotion, alert_flags)
+                            VALUES (?,?,?,?,?,?,?)''', rows)
+
+def fetch_timeline(session_id):
+    with _conn_lock:
+        return get_connection().execute(
+            'SELECT second, state, ear, mar, emotion, alert_flags FROM timeline WHERE session_id=? ORDER BY second',
+            (session_id,)
+        ).fetchall()
+
+# --- Dashboard queries (rollups and indexed ranges only) ---
+
+def dashboard_version():
+    # Changes whenever a session is completed; used as the dashboard cache key
+    with _conn_lock:
+        return get_connection().execute('SELECT COALESCE(SUM(sessions), 0) FROM user_rollup').fetchone()[0]
+
+def fetch_totals(username=None):
+    # (sessions, total_seconds, mean focus %) across all users or one
+    where, params = ('WHERE username=?', (username,)) if username else ('', ())
+    with _conn_lock:
+        sessions, total, pct_sum, pct_n = get_connection().execute(
+            f'''SELECT COALESCE(SUM(sessions), 0),
+                       COALESCE(SUM(focused_seconds + distracted_seconds + drowsy_seconds), 0),
+                       COALESCE(SUM(focus_percent_sum), 0), COALESCE(SUM(focus_sessions), 0)
+                FROM user_rollup {where}''', params
+        ).fetchone()
+    return sessions, total, (pct_sum / pct_n if pct_n else None)
+
+def fetch_daily(start_day=None, end_day=None, username=None):
+    # (day, sessions, total_seconds, focus %, alerts) per day, oldest first
+    clauses, params = [], []
+    for clause, value in (('day >= ?', start_day), ('day <= ?', end_day), ('username = ?', username)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    where = 'WHERE ' + ' AND '.join(clauses) if clauses else ''
+    with _conn_lock:
+        return get_connection().execute(
+            f'''SELECT day, SUM(sessions), SUM(focused_seconds + distracted_seconds + drowsy_seconds),
+                       SUM(focus_percent_sum) / NULLIF(SUM(focus_sessions), 0), SUM(alerts)
+                FROM daily_rollup {where} GROUP BY day ORDER BY day''', params
+        ).fetchall()
+
+def _session_range(start_time, end_time):
+    clauses, params = ['end_time IS NOT NULL'], []
+    if start_time is not None:
+        clauses.append('start_time >= ?')
+        params.append(start_time)
+    if end_time is not None:
+        clauses.append('start_time < ?')
+        params.append(end_time)
+    return 'WHERE ' + ' AND '.join(clauses), params
+
+def count_sessions(start_time=None, end_time=None):
+    where, params = _session_range(start_time, end_time)
+    with _conn_lock:
+        return get_connection().execute(f'SELECT COUNT(*) FROM sessions {where}', params).fetchone()[0]
+
+def fetch_sessions(start_time=None, end_time=None, limit=50, offset=0):
+    # One page of completed sessions, newest first, in [start_time, end_time)
+    where, params = _session_range(start_time, end_time)
+    with _conn_lock:
+        return get_connection().execute(
+            f'SELECT * FROM sessions {where} ORDER BY start_time DESC, id DESC LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        ).fetchall()
 
 def fetch_all():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('SELECT * FROM sessions ORDER BY id DESC')
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    with _conn_lock:
+        return get_connection().execute(
+            'SELECT * FROM sessions WHERE end_time IS NOT NULL ORDER BY id DESC'
+        ).fetchall()
 
 if __name__ == "__main__":
     init_db()
-    print("✅ Database initialized at", os.path.abspath(DB_FILE))
\ No newline at end of file
+    print("✅ Database initialized at", os.path.abspath(DB_FILE))
@@ -0,0 +1,161 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+from config import EMOTION_MODEL_PATH, EMOTION_BACKEND, EMOTION_QUANTIZE
+
+# FER2013 models take 48x48 gray crops, batch of N -> (N, 7) class scores
+INPUT_SHAPE = (48, 48, 1)
+
+
+class EmotionBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def predict(self, batch):
+        # batch: float32 array (N, 48, 48, 1) in [0, 1]
+        ...
+
+    def warmup(self, runs=3):
+        # The first calls build graphs / allocate tensors; do that at load time
+        # instead of on the first live frame.
+        dummy = np.zeros((1,) + INPUT_SHAPE, dtype=np.float32)
+        for _ in range(runs):
+            self.predict(dummy)
+
+
+class KerasBackend(EmotionBackend):
+    # Calls the model through a compiled tf.function instead of model.predict,
+    # which builds a tf.data pipeline and callbacks on every call.
+    name = "keras"
+
+    def __init__(self, model_path=EMOTION_MODEL_PATH):
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+
+        self.model = load_model(model_path, compile=False)
+        self._call = tf.function(
+            lambda x: self.model(x, training=False),
+            input_signature=[tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32)],
+        )
+
+    def predict(self, batch):
+        return self._call(batch).numpy()
+
+
+class TFLiteBackend(EmotionBackend):
+    name = "tflite"
+
+    def __init__(self, model_path=EMOTION_MODEL_PATH, quantize=EMOTION_QUANTIZE):
+        tflite_path = _derived_path(model_path, ".int8.tflite" if quantize else ".tflite")
+        if not os.path.exists(tflite_path):
+            _convert_to_tflite(model_path, tflite_path, quantize)
+
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=tflite_path)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]["index"]
+        self._output = self.interpreter.get_output_details()[0]["index"]
+        self._batch = 1
+        self._lock = threading.Lock()  # an interpreter must not be invoked concurrently
+
+    def predict(self, batch):
+        with self._lock:
+            if len(batch) != self._batch:
+                self.interpreter.resize_tensor_input(self._input, (len(batch),) + INPUT_SHAPE)
+                self.interpreter.allocate_tensors()
+                self._batch = len(batch)
+            self.interpreter.set_tensor(self._input, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output).copy()
+
+
+class OnnxBackend(EmotionBackend):
+    name = "onnx"
+
+    def __init__(self, model_path=EMOTION_MODEL_PATH, quantize=EMOTION_QUANTIZE):
+        import onnxruntime as ort
+
+        onnx_path = _derived_path(model_path, ".onnx")
+        if not os.path.exists(onnx_path):
+            _convert_to_onnx(model_path, onnx_path)
+        if quantize:
+            int8_path = _derived_path(model_path, ".int8.onnx")
+            if not os.path.exists(int8_path):
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+            onnx_path = int8_path
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1  # tiny CNN: threading overhead beats the gain
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return self.session.run(None, {self._input: batch})[0]
+
+
+BACKENDS = {
+    "keras": KerasBackend,
+    "tflite": TFLiteBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_emotion_backend(name=EMOTION_BACKEND, model_path=EMOTION_MODEL_PATH,
+                         quantize=EMOTION_QUANTIZE, warmup=True):
+    # "auto" picks the fastest backend whose runtime is installed
+    if name == "auto":
+        backend = None
+        for candidate in ("onnx", "tflite", "keras"):
+            try:
+                backend = load_emotion_backend(candidate, model_path, quantize, warmup)
+                break
+            except ImportError:
+                continue
+        if backend is None:
+            raise ImportError("No emotion inference runtime installed (onnxruntime, tflite-runtime or tensorflow)")
+        return backend
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown emotion backend '{name}', expected one of {sorted(BACKENDS)} or 'auto'")
+
+    cls = BACKENDS[name]
+    backend = cls(model_path) if cls is KerasBackend else cls(model_path, quantize)
+    if warmup:
+        backend.warmup()
+    return backend
+
+
+# --- One-off model conversion (cached next to the .h5) ---
+
+def _derived_path(model_path, suffix):
+    return os.path.splitext(model_path)[0] + suffix
+
+
+def _convert_to_tflite(model_path, tflite_path, quantize):
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_model(model_path, compile=False))
+    if quantize:
+        # Dynamic-range quantisation: int8 weights, no calibration set needed
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(tflite_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def _convert_to_onnx(model_path, onnx_path):
+    import tensorflow as tf
+    import tf2onnx
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path, compile=False)
+    spec = (tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=onnx_path)
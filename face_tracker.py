@@ -0,0 +1,78 @@
+import dlib
+import numpy as np
+from config import FACE_DETECT_EVERY_N, FACE_TRACK_MIN_QUALITY, FACE_SEARCH_MARGIN
+
+
+class FaceTracker:
+    # Runs the full-frame HOG detector only every N frames (or after the track
+    # is lost) and follows the face with a correlation tracker in between.
+    # detect_every=1 turns tracking off: a full detection on every frame.
+    def __init__(self, detector, detect_every=FACE_DETECT_EVERY_N,
+                 min_quality=FACE_TRACK_MIN_QUALITY, search_margin=FACE_SEARCH_MARGIN):
+        self.detector = detector
+        self.detect_every = max(1, detect_every)
+        self.min_quality = min_quality
+        self.search_margin = search_margin
+        self.tracker = dlib.correlation_tracker()
+        self.face = None  # last known face box (dlib.rectangle)
+        self.frames_since_detect = 0
+
+        # Stats
+        self.full_detections = 0
+        self.region_detections = 0
+        self.tracked_frames = 0
+
+    def reset(self):
+        self.face = None
+        self.frames_since_detect = 0
+
+    def update(self, gray):
+        if self.face is not None and self.frames_since_detect < self.detect_every - 1:
+            quality = self.tracker.update(gray)
+            if quality >= self.min_quality:
+                self.frames_since_detect += 1
+                self.tracked_frames += 1
+                self.face = self._to_rect(self.tracker.get_position(), gray.shape)
+                return self.face
+            # Track lost, fall through to a fresh detection
+
+        tracking = self.detect_every > 1
+        face = None
+        if tracking and self.face is not None:
+            face = self._detect_near(gray, self.face)
+        if face is None:
+            faces = self.detector(gray, 0)
+            self.full_detections += 1
+            face = faces[0] if len(faces) > 0 else None
+
+        self.face = face
+        self.frames_since_detect = 0
+        if tracking and face is not None:
+            self.tracker.start_track(gray, face)
+        return face
+
+    def _detect_near(self, gray, face):
+        # Search only the region around the last box before scanning the whole frame
+        h, w = gray.shape[:2]
+        mx = int(face.width() * self.search_margin)
+        my = int(face.height() * self.search_margin)
+        x0, y0 = max(0, face.left() - mx), max(0, face.top() - my)
+        x1, y1 = min(w, face.right() + mx), min(h, face.bottom() + my)
+        if x1 - x0 < 80 or y1 - y0 < 80:  # too small for the HOG window
+            return None
+
+        roi = np.ascontiguousarray(gray[y0:y1, x0:x1])
+        faces = self.detector(roi, 0)
+        self.region_detections += 1
+        if len(faces) == 0:
+            return None
+        f = faces[0]
+        return dlib.rectangle(f.left() + x0, f.top() + y0, f.right() + x0, f.bottom() + y0)
+
+    @staticmethod
+    def _to_rect(pos, shape):
+        h, w = shape[:2]
+        return dlib.rectangle(
+            max(0, int(pos.left())), max(0, int(pos.top())),
+            min(w - 1, int(pos.right())), min(h - 1, int(pos.bottom()))
+        )
@@ -1,13 +1,26 @@
 import cv2
-import numpy as np
 from model_utils import get_dlib_detector
+from face_tracker import FaceTracker
+from presence import PresenceMonitor
+from profiling import NULL_PROFILER
+from buffers import FrameBuffers
+from landmark_features import landmark_features, posture_alert
+from frame_clock import FrameClock
+from frame_result import FrameResult, rect_to_box, DISTRACTED, DROWSY
 from imutils import face_utils
 # --- IMPORTED FROM CONFIG ---
-from config import EYE_AR_THRESH, EYE_AR_CONSEC_FRAMES, MOUTH_AR_THRESH
-
-class FocusEstimator:
-    def __init__(self):
+from config import (
+    EYE_AR_THRESH, EYE_AR_CONSEC_FRAMES, MOUTH_AR_THRESH,
+    FACE_TRACKING, FACE_DETECT_EVERY_N
+)
+
+class FocusEstimator(FrameClock):
+    def __init__(self, tracking=FACE_TRACKING, profiler=None):
+        self.profiler = profiler or NULL_PROFILER  # per-stage timings (see profiling.py)
+        self.buffers = FrameBuffers(self.profiler)  # per-session scratch arrays
         self.detector, self.predictor = get_dlib_detector()
+        self.face_tracker = FaceTracker(self.detector, detect_every=FACE_DETECT_EVERY_N if tracking else 1)
+        self.presence = PresenceMonitor(buffers=self.buffers)  # pauses the detector while nobody is there
         self.eye_counter = 0
         self.blink_alert = False
         self.yawn_alert = False
@@ -15,54 +28,46 @@ class FocusEstimator:
         self.focused_seconds = 0
         self.drowsy_seconds = 0
         self.distracted_seconds = 0 
-
-        (self.lStart, self.lEnd) = face_utils.FACIAL_LANDMARKS_IDXS["left_eye"]
-        (self.rStart, self.rEnd) = face_utils.FACIAL_LANDMARKS_IDXS["right_eye"]
-        (self.mStart, self.mEnd) = face_utils.FACIAL_LANDMARKS_IDXS["mouth"]
+        self.last_timestamp = None
     
-    def eye_aspect_ratio(self, eye):
-        A = np.linalg.norm(eye[1]-eye[5])
-        B = np.linalg.norm(eye[2]-eye[4])
-        C = np.linalg.norm(eye[0]-eye[3])
-        if C == 0: return 0.3 
-        return (A+B)/(2.0*C)
-
-    def mouth_aspect_ratio(self, mouth):
-
-        A = np.linalg.norm(mouth[2]-mouth[10]) 
-        B = np.linalg.norm(mouth[4]-mouth[8]) 
-
-        C = np.linalg.norm(mouth[0]-mouth[6]) 
-        if C == 0: return 0.0 
-        return (A+B)/(2.0*C)
-
-    def process_frame(self, frame):
-        # --- Estimate frame processing time (assuming ~30FPS) ---
-        FRAME_TIME_DELTA = 1/30.0 
+    def process_frame(self, frame, timestamp=None):
+        # Analyses the frame without drawing on it; see draw()
+        # --- Time since the previous analysed frame ---
+        frame_time_delta = self.frame_delta(timestamp)
         
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.detector(gray, 0)
+        profiler = self.profiler
+        face = None
+        with profiler.stage("presence"):
+            detect = self.presence.should_detect(frame, self.last_timestamp)
+        if detect:
+            with profiler.stage("convert"):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.buffers.get("gray", frame.shape[:2]))
+            with profiler.stage("detect"):
+                face = self.face_tracker.update(gray)
+            self.presence.update(face is not None, self.last_timestamp)
+
+        result = FrameResult(self.last_timestamp, frame_time_delta)
+        result.idle = self.presence.idle
 
         # Frame status
-        is_focused = True
         is_drowsy = False
         is_distracted = False
 
-        if len(faces) == 0:
+        if face is None:
             is_distracted = True 
             self.posture_alert = True 
         else:
-            face = faces[0] # Assume one student
-            shape = self.predictor(gray, face)
-            shape_np = face_utils.shape_to_np(shape)
+            # Assume one student
+            result.face_box = rect_to_box(face)
+            with profiler.stage("landmarks"):
+                shape = self.predictor(gray, face)
+                shape_np = face_utils.shape_to_np(shape)
+            result.landmarks = shape_np
 
-            # Eyes
-            leftEye = shape_np[self.lStart:self.lEnd]
-            rightEye = shape_np[self.rStart:self.rEnd]
-            leftEAR = self.eye_aspect_ratio(leftEye)
-            rightEAR = self.eye_aspect_ratio(rightEye)
-            ear = (leftEAR + rightEAR)/2.0
+            # EAR, MAR and posture in one pass (see landmark_features.py)
+            ear, mar, posture_deviation, nose_below_chin = landmark_features(shape_np)
 
+            # Eyes
             if ear < EYE_AR_THRESH:
                 self.eye_counter += 1
                 if self.eye_counter >= EYE_AR_CONSEC_FRAMES:
@@ -73,44 +78,47 @@ class FocusEstimator:
                 self.blink_alert = False
 
             # Mouth (Yawn)
-            mouth = shape_np[self.mStart:self.mEnd]
-            mar = self.mouth_aspect_ratio(mouth)
-            
             if mar > MOUTH_AR_THRESH:
                 is_distracted = True
                 self.yawn_alert = True
             else:
                 self.yawn_alert = False
 
-            # Posture (Simple check)
-            nose = shape_np[30] # Nose tip
-            chin = shape_np[8] # Chin bottom
-            
-            posture_deviation = abs(nose[0] - chin[0])
-            if posture_deviation > 40 or nose[1] > chin[1]: # Tweak '40'
+            # Posture (Simple check): head turned or tilted down
+            if posture_alert(posture_deviation, nose_below_chin):
                 is_distracted = True
                 self.posture_alert = True
             else:
                 self.posture_alert = False
 
-            # Draw landmarks
-            # for (x,y) in np.concatenate([leftEye, rightEye, mouth]):
-            #     cv2.circle(frame, (x,y), 1, (0,255,0), -1)
-
-            # Rectangle with color alerts
-            x1,y1,x2,y2 = face.left(), face.top(), face.right(), face.bottom()
-            color = (0,255,0) # Green = Focused
-            if is_drowsy:
-                color = (0,0,255) # Red = Drowsy
-            elif is_distracted:
-                color = (0,255,255) # Yellow = Distracted
-            cv2.rectangle(frame, (x1,y1), (x2,y2), color, 2)
+            result.ear = ear
+            result.mar = mar
+            result.posture_deviation = int(posture_deviation)
 
         if is_drowsy:
-            self.drowsy_seconds += FRAME_TIME_DELTA
+            self.drowsy_seconds += frame_time_delta
+            result.state = DROWSY
         elif is_distracted:
-            self.distracted_seconds += FRAME_TIME_DELTA
+            self.distracted_seconds += frame_time_delta
+            result.state = DISTRACTED
         else:
-            self.focused_seconds += FRAME_TIME_DELTA
-
-        return frame
\ No newline at end of file
+            self.focused_seconds += frame_time_delta
+
+        result.blink_alert = self.blink_alert
+        result.yawn_alert = self.yawn_alert
+        result.posture_alert = self.posture_alert
+        return result
+
+    def draw(self, frame, result):
+        # Face rectangle coloured by state, drawn in place; only for frames that are shown
+        if result.face_box is None:
+            return frame
+        x, y, w, h = result.face_box
+        color = (0,255,0) # Green = Focused
+        if result.is_drowsy:
+            color = (0,0,255) # Red = Drowsy
+        elif result.is_distracted:
+            color = (0,255,255) # Yellow = Distracted
+        with self.profiler.stage("draw"):
+            cv2.rectangle(frame, (x,y), (x+w,y+h), color, 2)
+        return frame
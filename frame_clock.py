@@ -0,0 +1,16 @@
+import time
+from config import MAX_FRAME_GAP
+
+
+class FrameClock:
+    # Mixin for the estimators: turns frame timestamps into the seconds each
+    # analysed frame counts for. Uses (and updates) self.last_timestamp.
+    last_timestamp = None
+
+    def frame_delta(self, timestamp):
+        # Wall-clock time this frame stands for (time since the previous analysed frame)
+        if timestamp is None:
+            timestamp = time.monotonic()
+        delta = 0.0 if self.last_timestamp is None else timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+        return min(max(delta, 0.0), MAX_FRAME_GAP)
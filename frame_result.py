@@ -0,0 +1,68 @@
+FOCUSED = "focused"
+DISTRACTED = "distracted"
+DROWSY = "drowsy"
+STATES = (FOCUSED, DISTRACTED, DROWSY)  # stored as the index (recordings, timeline)
+
+# Bits of the stored alert flags
+FLAG_FACE = 1
+FLAG_BLINK = 2
+FLAG_YAWN = 4
+FLAG_POSTURE = 8
+FLAG_EMOTION = 16
+FLAG_IDLE = 32  # analysed in low-power mode (presence.py)
+
+
+class FrameResult:
+    # Verdict for one analysed frame, returned by process_frame. Drawing is a
+    # separate step (estimator.draw) so headless callers never pay for it.
+    # Boxes are (x, y, w, h); features stay None when no face was found.
+    __slots__ = ("timestamp", "frame_time_delta", "state", "face_box", "landmarks",
+                 "ear", "mar", "posture_deviation", "emotion", "emotion_scores", "emotion_box",
+                 "blink_alert", "yawn_alert", "posture_alert", "emotion_alert", "idle")
+
+    def __init__(self, timestamp, frame_time_delta, face_box=None):
+        self.timestamp = timestamp
+        self.frame_time_delta = frame_time_delta
+        self.state = FOCUSED
+        self.face_box = face_box
+        self.landmarks = None  # (68, 2) int array
+        self.ear = None
+        self.mar = None
+        self.posture_deviation = None
+        self.emotion = None  # Pro mode only
+        self.emotion_scores = None  # FER model output row
+        self.emotion_box = None
+        self.blink_alert = False
+        self.yawn_alert = False
+        self.posture_alert = False
+        self.emotion_alert = False
+        self.idle = False  # nobody around: estimator in low-power mode
+
+    @property
+    def is_drowsy(self):
+        return self.state == DROWSY
+
+    @property
+    def is_distracted(self):
+        return self.state == DISTRACTED
+
+    @property
+    def flags(self):
+        # FLAG_* bits
+        flags = FLAG_FACE if self.landmarks is not None else 0
+        if self.blink_alert:
+            flags |= FLAG_BLINK
+        if self.yawn_alert:
+            flags |= FLAG_YAWN
+        if self.posture_alert:
+            flags |= FLAG_POSTURE
+        if self.emotion_alert:
+            flags |= FLAG_EMOTION
+        if self.idle:
+            flags |= FLAG_IDLE
+        return flags
+
+
+def rect_to_box(rect):
+    # dlib.rectangle -> (x, y, w, h)
+    return rect.left(), rect.top(), rect.right() - rect.left(), rect.bottom() - rect.top()
@@ -0,0 +1,110 @@
+"""Study sessions without Streamlit, for kiosks and lab machines.
+
+    python headless.py --mode normal --minutes 90
+    python headless.py --pomodoro 4 --source camera:1 --username lab-pc-07
+
+Runs the same capture pipeline, estimators, alert cooldowns and database
+writes as the app, with no rendering: the only per-frame cost is the analysis.
+Stats are logged every --stats-interval seconds. Ctrl-C ends (and saves) the
+current session.
+"""
+import argparse
+import logging
+import time
+
+import db
+from alerts import ALERT_MESSAGES
+from config import VIDEO_SOURCE, POMODORO_MINUTES, POMODORO_BREAK_MINUTES
+from session import StudySession
+
+log = logging.getLogger("headless")
+
+
+def log_alert(kind, result):
+    log.warning("Alert: %s", ALERT_MESSAGES[kind])
+
+
+def run_session(mode, source_spec, seconds, username, save=True, stats_interval=30.0, profile=False):
+    # One session of at most `seconds` (None = until the source ends or Ctrl-C).
+    # Returns (record, interrupted); record is None if the source couldn't be opened.
+    session = StudySession(mode, source_spec, username, save, profile, on_alert=log_alert, preview_fps=0)
+    if not session.start():
+        log.error("Cannot open video source: %s", source_spec)
+        return None, False
+
+    pipeline = session.pipeline
+    log.info("Session started (%s mode, %s)", mode, source_spec)
+    started = time.monotonic()
+    next_stats = started + stats_interval
+    interrupted = False
+    try:
+        while seconds is None or time.monotonic() - started < seconds:
+            time.sleep(0.5)
+            if pipeline.failed:
+                log.info("Video source ended")
+                break
+            if pipeline.error is not None:
+                log.error("Analysis stopped: %s", pipeline.error)
+                break
+            if time.monotonic() >= next_stats:
+                next_stats += stats_interval
+                log.info("focus %(focus_percent).1f%% | focused %(focused_seconds).0fs "
+                         "distracted %(distracted_seconds).0fs drowsy %(drowsy_seconds).0fs | alerts %(alerts)d | "
+                         "analysing %(analysis_fps).1f fps, latency %(latency_ms)d ms", session.stats())
+    except KeyboardInterrupt:
+        log.info("Interrupted")
+        interrupted = True
+
+    record = session.stop()
+    log.info("Session saved: focused %ds, distracted %ds, drowsy %ds, %d alerts",
+             record["focused_seconds"], record["distracted_seconds"], record["drowsy_seconds"], record["alerts"])
+    return record, interrupted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run study sessions without the Streamlit UI")
+    parser.add_argument("--mode", choices=["normal", "pro"], default="normal")
+    parser.add_argument("--source", default=VIDEO_SOURCE, help="camera[:index], file:<path>, dir:<path>, synthetic")
+    length = parser.add_mutually_exclusive_group()
+    length.add_argument("--minutes", type=float, help="session length (default: until the source ends)")
+    length.add_argument("--pomodoro", type=int, metavar="N",
+                        help=f"N cycles of {POMODORO_MINUTES} min study + {POMODORO_BREAK_MINUTES} min break, "
+                             "one session each")
+    parser.add_argument("--username", default="pundra_student")
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="seconds between stats lines")
+    parser.add_argument("--profile", action="store_true", help="dump per-stage timings at the end")
+    parser.add_argument("--no-db", action="store_true", help="don't save the session")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.no_db:
+        db.init_db()
+
+    save = not args.no_db
+    if args.pomodoro:
+        for cycle in range(1, args.pomodoro + 1):
+            log.info("Pomodoro %d/%d", cycle, args.pomodoro)
+            record, interrupted = run_session(args.mode, args.source, POMODORO_MINUTES * 60, args.username, save,
+                                              args.stats_interval, args.profile)
+            if record is None:
+                return 1
+            if interrupted:  # Ctrl-C ends the whole run, not just this Pomodoro
+                break
+            if cycle < args.pomodoro:
+                # The camera is released during the break
+                log.info("Pomodoro complete! Take a %d minute break.", POMODORO_BREAK_MINUTES)
+                try:
+                    time.sleep(POMODORO_BREAK_MINUTES * 60)
+                except KeyboardInterrupt:
+                    break
+    else:
+        seconds = args.minutes * 60 if args.minutes else None
+        record, _ = run_session(args.mode, args.source, seconds, args.username, save, args.stats_interval,
+                                args.profile)
+        if record is None:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
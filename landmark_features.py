@@ -0,0 +1,49 @@
+import numpy as np
+from config import POSTURE_MAX_DEVIATION
+
+# Point pairs on the 68-point dlib layout, measured in one gather:
+#   EAR = (|p1-p5| + |p2-p4|) / (2 |p0-p3|) per eye
+#   MAR = (|p2-p10| + |p4-p8|) / (2 |p0-p6|) on the outer lip (points 48-59)
+_PAIRS = np.array([
+    (37, 41), (38, 40), (36, 39),  # right eye
+    (43, 47), (44, 46), (42, 45),  # left eye
+    (50, 58), (52, 56), (48, 54),  # mouth
+])
+NOSE_TIP = 30
+CHIN = 8
+
+
+def _ratio(d, i, zero_value):
+    # (d[i] + d[i+1]) / (2 d[i+2]), with zero_value where the base length is 0
+    base = d[:, i + 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (d[:, i] + d[:, i + 1]) / (2.0 * base)
+    return np.where(base == 0, zero_value, ratio)
+
+
+def landmark_features(shapes):
+    # (68, 2) or (N, 68, 2) landmarks -> (ear, mar, posture_deviation, nose_below_chin)
+    # as floats / bools for one face, or (N,) arrays for a batch.
+    shapes = np.asarray(shapes)
+    single = shapes.ndim == 2
+    if single:
+        shapes = shapes[np.newaxis]
+    shapes = shapes.astype(np.float64, copy=False)
+
+    diff = shapes[:, _PAIRS[:, 0]] - shapes[:, _PAIRS[:, 1]]  # (N, 9, 2)
+    d = np.sqrt(np.einsum("npk,npk->np", diff, diff))
+
+    ear = (_ratio(d, 0, 0.3) + _ratio(d, 3, 0.3)) / 2.0
+    mar = _ratio(d, 6, 0.0)
+    nose, chin = shapes[:, NOSE_TIP], shapes[:, CHIN]
+    posture_deviation = np.abs(nose[:, 0] - chin[:, 0])
+    nose_below_chin = nose[:, 1] > chin[:, 1]
+
+    if single:
+        return float(ear[0]), float(mar[0]), float(posture_deviation[0]), bool(nose_below_chin[0])
+    return ear, mar, posture_deviation, nose_below_chin
+
+
+def posture_alert(posture_deviation, nose_below_chin, max_deviation=POSTURE_MAX_DEVIATION):
+    # Works on scalars and arrays alike
+    return (posture_deviation > max_deviation) | nose_below_chin
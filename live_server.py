@@ -0,0 +1,386 @@
+"""Live session over plain HTTP: MJPEG video and server-sent events, no Streamlit.
+
+    python live_server.py --mode pro --autostart
+    open http://127.0.0.1:8765/
+
+    GET  /                viewer page
+    GET  /stream.mjpg     annotated frames (multipart/x-mixed-replace)
+    GET  /events          server-sent events: stats (every LIVE_STATS_INTERVAL), alert, pomodoro, session, error
+    GET  /status          session state and stats as JSON
+    POST /start?mode=pro  /stop  /pomodoro
+
+One session at a time, watched by any number of viewers. Capture and analysis
+run on the pipeline's threads; each preview frame is drawn and JPEG-encoded
+once, on a worker thread, and the same bytes go to every viewer. The event
+loop only moves bytes, so Stop takes effect at once instead of on a rerun.
+"""
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+from urllib.parse import parse_qsl
+
+import db
+from alerts import ALERT_MESSAGES
+from config import (
+    VIDEO_SOURCE, POMODORO_MINUTES, POMODORO_BREAK_MINUTES,
+    LIVE_SERVER_HOST, LIVE_SERVER_PORT, LIVE_STATS_INTERVAL
+)
+from preview import PreviewRenderer
+from profiling import NULL_PROFILER
+from session import StudySession
+
+KEEPALIVE_SECONDS = 15
+VIEWER_CHECK_SECONDS = 1.0  # how often an idle video stream checks that its viewer is still there
+
+PAGE = b"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Study session</title>
+<style>body{font-family:sans-serif;margin:2em}img{max-width:100%;background:#222}#alert{color:#c00}</style>
+</head><body>
+<img src="/stream.mjpg" alt="live video">
+<p><button onclick="post('/start?mode=normal')">Start</button>
+<button onclick="post('/start?mode=pro')">Start (Pro)</button>
+<button onclick="post('/pomodoro')">Start Pomodoro</button>
+<button onclick="post('/stop')">Stop</button></p>
+<h3 id="stats">No session</h3><p id="pomodoro"></p><p id="alert"></p>
+<script>
+function post(url) { fetch(url, {method: "POST"}); }
+const $ = id => document.getElementById(id);
+const events = new EventSource("/events");
+events.addEventListener("stats", e => {
+  const s = JSON.parse(e.data);
+  $("stats").textContent = `Focus ${s.focus_percent}% | focused ${s.focused_seconds}s | distracted ` +
+    `${s.distracted_seconds}s | drowsy ${s.drowsy_seconds}s | alerts ${s.alerts} | ${s.state || "---"}`;
+  $("pomodoro").textContent = s.pomodoro_remaining == null ? "" :
+    `Pomodoro ${String(Math.floor(s.pomodoro_remaining / 60)).padStart(2, "0")}:` +
+    `${String(s.pomodoro_remaining % 60).padStart(2, "0")}`;
+  if (s.posture_alert) $("alert").textContent = "Sit upright!";
+});
+events.addEventListener("alert", e => { $("alert").textContent = JSON.parse(e.data).message; });
+events.addEventListener("pomodoro", e => { $("pomodoro").textContent = JSON.parse(e.data).message; });
+events.addEventListener("error", e => { if (e.data) $("alert").textContent = JSON.parse(e.data).message; });
+events.addEventListener("session", e => {
+  const s = JSON.parse(e.data);
+  if (!s.running) $("stats").textContent = s.record ? "Session saved" : "No session";
+});
+</script></body></html>
+"""
+
+
+class EventHub:
+    # Fan-out of server-sent events. Each message is encoded once; a viewer
+    # that falls behind loses its oldest messages rather than growing a backlog.
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self.clients = set()
+
+    @staticmethod
+    def format(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+    def subscribe(self):
+        queue = asyncio.Queue(self.maxsize)
+        self.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+    def publish(self, event, data):
+        message = self.format(event, data)
+        for queue in self.clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+
+class FrameBroadcast:
+    # Newest JPEG of the session; viewers wait for a newer one and skip any they missed
+    def __init__(self):
+        self._cond = asyncio.Condition()
+        self.jpeg = None
+        self.seq = 0
+        self.viewers = 0
+
+    async def publish(self, jpeg):
+        async with self._cond:
+            self.jpeg = jpeg
+            self.seq += 1
+            self._cond.notify_all()
+
+    async def wait_newer(self, seq, timeout=None):
+        # (seq, jpeg) of a newer frame, or (seq, None) if none came within `timeout`
+        async with self._cond:
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self.seq != seq), timeout)
+            except asyncio.TimeoutError:
+                return seq, None
+            return self.seq, self.jpeg
+
+
+class LiveServer:
+    def __init__(self, mode="normal", source_spec=VIDEO_SOURCE, username="pundra_student", save=True):
+        self.mode = mode
+        self.source_spec = source_spec
+        self.username = username
+        self.save = save
+        self.session = None
+        self.pomodoro_end = None  # loop time the running Pomodoro ends at
+        self.events = EventHub()
+        self.frames = FrameBroadcast()
+        self.preview = PreviewRenderer()
+        self.loop = None
+        self._lock = None  # serialises start / stop
+        self._tasks = []
+        self._writers = set()  # open connections, closed on shutdown
+        self.routes = {
+            ("GET", "/"): self._page,
+            ("GET", "/stream.mjpg"): self._stream,
+            ("GET", "/events"): self._events,
+            ("GET", "/status"): self._status,
+            ("POST", "/start"): self._start,
+            ("POST", "/stop"): self._stop,
+            ("POST", "/pomodoro"): self._pomodoro,
+        }
+
+    # --- Session ---
+
+    @property
+    def running(self):
+        return self.session is not None and self.session.running
+
+    def _alert_from_thread(self, kind, result):
+        # AlertSink callback, on the analysis thread
+        data = {"kind": kind, "message": ALERT_MESSAGES[kind], "emotion": result.emotion}
+        self.loop.call_soon_threadsafe(self.events.publish, "alert", data)
+
+    async def start_session(self, mode):
+        async with self._lock:
+            if self.running:
+                return False
+            session = StudySession(mode, self.source_spec, self.username, self.save,
+                                   on_alert=self._alert_from_thread)
+            # Opening the camera and loading models blocks; keep the loop serving
+            try:
+                started = await self.loop.run_in_executor(None, session.start)
+            except Exception as e:  # e.g. a model file is missing; start() has released the source
+                self.events.publish("error", {"message": f"Cannot start the session: {e}"})
+                raise
+            if not started:
+                self.events.publish("error", {"message": f"Cannot open video source: {self.source_spec}"})
+                return False
+            self.session = session
+            self.preview = PreviewRenderer(profiler=session.profiler)
+            self._tasks = [self.loop.create_task(self._frames_loop(session)),
+                           self.loop.create_task(self._stats_loop(session))]
+            self.events.publish("session", {"running": True, "mode": mode})
+            return True
+
+    async def stop_session(self):
+        async with self._lock:
+            if not self.running:
+                return None
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+            self.pomodoro_end = None
+            record = await self.loop.run_in_executor(None, self.session.stop)
+            self.events.publish("session", {"running": False, "record": record})
+            return record
+
+    def _render(self, session, item):
+        # Worker thread: annotate a copy of the newest frame and encode it once for all viewers
+        _, frame, result = item
+        with (session.profiler or NULL_PROFILER).stage("render"):
+            if result is not None:
+                canvas = self.preview.buffers.get("canvas", frame.shape)
+                canvas[...] = frame
+                frame = session.estimator.draw(canvas, result)
+            return self.preview.render(frame)
+
+    async def _frames_loop(self, session):
+        pipeline = session.pipeline
+        seq = 0
+        while True:
+            seq, item = await self.loop.run_in_executor(None, pipeline.wait_for_frame, seq)
+            if pipeline.failed or pipeline.error is not None:
+                message = "Video feed lost." if pipeline.failed else f"Analysis stopped: {pipeline.error}"
+                self.events.publish("error", {"message": message})
+                self.loop.create_task(self.stop_session())
+                return
+            # Nothing is drawn or encoded while nobody watches
+            if item is not None and self.frames.viewers:
+                jpeg = await self.loop.run_in_executor(None, self._render, session, item)
+                if jpeg is not None:
+                    await self.frames.publish(jpeg)
+            await asyncio.sleep(self.preview.interval)
+
+    async def _stats_loop(self, session):
+        pipeline = session.pipeline
+        while True:
+            _, result = pipeline.verdict.get()
+            stats = session.stats()
+            stats["state"] = result.state if result is not None else None
+            stats["emotion"] = result.emotion if result is not None else None
+            stats["posture_alert"] = bool(result is not None and result.posture_alert)
+            stats["pomodoro_remaining"] = None
+            if self.pomodoro_end is not None:
+                remaining = max(0, int(self.pomodoro_end - self.loop.time()))
+                stats["pomodoro_remaining"] = remaining
+                if remaining == 0:
+                    self.pomodoro_end = None
+                    self.events.publish("pomodoro", {"running": False, "message":
+                                        f"Pomodoro complete! Take a {POMODORO_BREAK_MINUTES} minute break."})
+            self.events.publish("stats", stats)
+            await asyncio.sleep(LIVE_STATS_INTERVAL)
+
+    def state(self):
+        return {
+            "running": self.running,
+            "mode": self.session.mode if self.running else None,
+            "stats": self.session.stats() if self.running else None,
+            "viewers": self.frames.viewers,
+            "pomodoro_remaining": None if self.pomodoro_end is None
+            else max(0, int(self.pomodoro_end - self.loop.time())),
+        }
+
+    # --- HTTP ---
+
+    async def handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers aren't needed
+            path, _, query = target.partition("?")
+            route = self.routes.get((method, path))
+            if route is None:
+                await self._respond(writer, HTTPStatus.NOT_FOUND, {"error": "not found"})
+            else:
+                await route(reader, writer, dict(parse_qsl(query)))
+        except (ConnectionError, ValueError):
+            pass  # viewer went away, or not HTTP
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def _head(status, content_type, length=None):
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: {content_type}\r\n"
+        if length is not None:
+            head += f"Content-Length: {length}\r\n"
+        return (head + "Cache-Control: no-cache\r\nConnection: close\r\n\r\n").encode()
+
+    async def _respond(self, writer, status, data, content_type="application/json"):
+        body = data if isinstance(data, bytes) else json.dumps(data).encode()
+        writer.write(self._head(status, content_type, len(body)))
+        writer.write(body)
+        await writer.drain()
+
+    async def _page(self, reader, writer, params):
+        await self._respond(writer, HTTPStatus.OK, PAGE, "text/html; charset=utf-8")
+
+    async def _status(self, reader, writer, params):
+        await self._respond(writer, HTTPStatus.OK, self.state())
+
+    async def _start(self, reader, writer, params):
+        if self.running:
+            await self._respond(writer, HTTPStatus.CONFLICT, {"error": "a session is already running"})
+            return
+        try:
+            started = await self.start_session(params.get("mode", self.mode))
+        except Exception as e:
+            await self._respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"cannot start the session: {e}"})
+            return
+        if started:
+            await self._respond(writer, HTTPStatus.OK, self.state())
+        else:
+            await self._respond(writer, HTTPStatus.SERVICE_UNAVAILABLE,
+                                {"error": f"cannot open video source: {self.source_spec}"})
+
+    async def _stop(self, reader, writer, params):
+        record = await self.stop_session()
+        await self._respond(writer, HTTPStatus.OK, {"running": False, "record": record})
+
+    async def _pomodoro(self, reader, writer, params):
+        if not self.running:
+            await self._respond(writer, HTTPStatus.CONFLICT, {"error": "no session is running"})
+            return
+        if self.pomodoro_end is None:
+            self.pomodoro_end = self.loop.time() + POMODORO_MINUTES * 60
+            self.events.publish("pomodoro", {"running": True, "minutes": POMODORO_MINUTES})
+        await self._respond(writer, HTTPStatus.OK, self.state())
+
+    async def _stream(self, reader, writer, params):
+        writer.write(self._head(HTTPStatus.OK, "multipart/x-mixed-replace; boundary=frame"))
+        self.frames.viewers += 1
+        try:
+            seq = 0
+            # Without new frames nothing is written, so a viewer that left is
+            # only noticed by checking the connection between waits
+            while not (writer.is_closing() or reader.at_eof()):
+                seq, jpeg = await self.frames.wait_newer(seq, VIEWER_CHECK_SECONDS)
+                if jpeg is None:
+                    continue
+                writer.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % len(jpeg))
+                writer.write(jpeg)
+                writer.write(b"\r\n")
+                await writer.drain()
+        finally:
+            self.frames.viewers -= 1
+
+    async def _events(self, reader, writer, params):
+        writer.write(self._head(HTTPStatus.OK, "text/event-stream"))
+        queue = self.events.subscribe()
+        try:
+            writer.write(self.events.format("session", {"running": self.running}))
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    message = b": keep-alive\n\n"  # lets both ends notice a dead connection
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self.events.unsubscribe(queue)
+
+    async def serve(self, host=LIVE_SERVER_HOST, port=LIVE_SERVER_PORT, autostart=False):
+        self.loop = asyncio.get_running_loop()
+        self._lock = asyncio.Lock()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on http://{host}:{port}/")
+        if autostart:
+            await self.start_session(self.mode)
+        try:
+            await asyncio.Future()  # until cancelled (Ctrl-C)
+        finally:
+            # Streams never end by themselves: close them rather than wait for the viewers
+            server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self.stop_session()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a live study session as MJPEG + server-sent events")
+    parser.add_argument("--host", default=LIVE_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=LIVE_SERVER_PORT)
+    parser.add_argument("--mode", choices=["normal", "pro"], default="normal", help="mode for --autostart")
+    parser.add_argument("--source", default=VIDEO_SOURCE, help="camera[:index], file:<path>, dir:<path>, synthetic")
+    parser.add_argument("--username", default="pundra_student")
+    parser.add_argument("--autostart", action="store_true", help="start a session right away")
+    parser.add_argument("--no-db", action="store_true", help="don't save sessions")
+    args = parser.parse_args(argv)
+
+    if not args.no_db:
+        db.init_db()
+    server = LiveServer(args.mode, args.source, args.username, save=not args.no_db)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.autostart))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,64 @@
+import threading
+import time
+
 import dlib
+import startup_report
+from config import EMOTION_MODEL_PATH, EMOTION_BACKEND, EMOTION_QUANTIZE
 
 DLIB_PREDICTOR_PATH = "shape_predictor_68_face_landmarks.dat"
 
+# --- Process-wide model registry ---
+# Heavy assets are loaded lazily, once per process, and shared by every
+# estimator (all sessions and browser tabs). Estimators only keep per-session state.
+_models = {}
+_registry_lock = threading.Lock()
+_load_locks = {}
+
+
+def _get_or_load(key, loader, name):
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    # One lock per asset, so loading the FER model doesn't block a dlib lookup
+    with _registry_lock:
+        lock = _load_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _models:
+            start = time.perf_counter()
+            _models[key] = loader()
+            startup_report.record("model", name, time.perf_counter() - start)
+        return _models[key]
+
+
 def get_dlib_detector():
-    detector = dlib.get_frontal_face_detector()
-    predictor = dlib.shape_predictor(DLIB_PREDICTOR_PATH)
-    return detector, predictor
+    def load():
+        detector = dlib.get_frontal_face_detector()
+        predictor = dlib.shape_predictor(DLIB_PREDICTOR_PATH)
+        return detector, predictor
+    return _get_or_load("dlib", load, "dlib")
+
+
+class _LockedCascade:
+    # cv2.CascadeClassifier keeps scratch buffers, so shared use is serialised
+    def __init__(self, cascade):
+        self.cascade = cascade
+        self._lock = threading.Lock()
+
+    def detectMultiScale(self, *args, **kwargs):
+        with self._lock:
+            return self.cascade.detectMultiScale(*args, **kwargs)
+
+
+def get_face_cascade():
+    def load():
+        import cv2
+        return _LockedCascade(cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'))
+    return _get_or_load("haar_face", load, "haar_face")
+
+
+def get_emotion_model(backend=EMOTION_BACKEND, model_path=EMOTION_MODEL_PATH, quantize=EMOTION_QUANTIZE):
+    def load():
+        from emotion_backend import load_emotion_backend
+        return load_emotion_backend(backend, model_path, quantize)
+    return _get_or_load(("emotion", backend, model_path, quantize), load, f"emotion ({backend})")
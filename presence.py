@@ -0,0 +1,72 @@
+import cv2
+from buffers import FrameBuffers
+from config import PRESENCE_IDLE_AFTER, PRESENCE_THUMB_SIZE, PRESENCE_MOTION_THRESH, PRESENCE_PROBE_SECONDS
+
+
+class PresenceMonitor:
+    # Low-power mode for when nobody is at the desk. After `idle_after`
+    # seconds without a face the estimator stops running the face detector
+    # (and in Pro mode the Haar cascade and the emotion model): each frame is
+    # shrunk to a grayscale thumbnail and compared with the previous one, and
+    # the scheduler drops to PRESENCE_IDLE_FPS. Motion, or `probe_seconds`
+    # without a detector run, lets one frame through to the full detector;
+    # finding a face ends idle mode on that frame.
+    # Skipped frames are still verdicts (distracted, no face), so away time is counted.
+    def __init__(self, idle_after=PRESENCE_IDLE_AFTER, thumb_size=PRESENCE_THUMB_SIZE,
+                 motion_thresh=PRESENCE_MOTION_THRESH, probe_seconds=PRESENCE_PROBE_SECONDS, buffers=None):
+        self.idle_after = idle_after
+        self.thumb_size = thumb_size  # (width, height)
+        self.motion_thresh = motion_thresh
+        self.probe_seconds = probe_seconds
+        self.buffers = buffers or FrameBuffers()
+        self.idle = False
+        self.last_face = None  # timestamp of the last frame with a face
+        self.last_probe = None  # timestamp of the last detector run while idle
+        self._has_reference = False
+        self._slot = 0  # thumbnails alternate between two buffers: current / previous
+
+        # Stats
+        self.idle_periods = 0
+        self.skipped_frames = 0
+
+    def _moved(self, frame):
+        # Mean absolute difference between this thumbnail and the previous one
+        w, h = self.thumb_size
+        small = cv2.resize(frame, (w, h), dst=self.buffers.get("presence_bgr", (h, w) + frame.shape[2:]),
+                           interpolation=cv2.INTER_AREA)
+        self._slot ^= 1
+        thumb = self.buffers.get(f"presence_{self._slot}", (h, w))
+        if small.ndim == 3:
+            cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=thumb)
+        else:
+            thumb[...] = small
+        if not self._has_reference:
+            self._has_reference = True
+            return False
+        previous = self.buffers.get(f"presence_{self._slot ^ 1}", (h, w))
+        diff = cv2.absdiff(thumb, previous, dst=self.buffers.get("presence_diff", (h, w)))
+        return diff.mean() > self.motion_thresh
+
+    def should_detect(self, frame, timestamp):
+        # False if the frame can skip the detectors: idle, no motion, no probe due
+        if not self.idle:
+            return True
+        moved = self._moved(frame)
+        if moved or timestamp - self.last_probe >= self.probe_seconds:
+            self.last_probe = timestamp
+            return True
+        self.skipped_frames += 1
+        return False
+
+    def update(self, has_face, timestamp):
+        # After every detector run
+        if has_face:
+            self.last_face = timestamp
+            self.idle = False
+        elif self.last_face is None:
+            self.last_face = timestamp  # the countdown starts with the session
+        elif not self.idle and timestamp - self.last_face >= self.idle_after:
+            self.idle = True
+            self.idle_periods += 1
+            self.last_probe = timestamp
+            self._has_reference = False
@@ -0,0 +1,62 @@
+import time
+
+import cv2
+from buffers import FrameBuffers
+from config import PREVIEW_FPS, PREVIEW_WIDTH, PREVIEW_JPEG_QUALITY, STATS_MIN_INTERVAL
+
+
+class PreviewRenderer:
+    # Turns frames into small JPEGs for the live video panel, at most max_fps
+    # times per second. Streamlit forwards JPEG bytes as-is instead of
+    # re-encoding a full-size RGB array on every update.
+    def __init__(self, max_fps=PREVIEW_FPS, width=PREVIEW_WIDTH, jpeg_quality=PREVIEW_JPEG_QUALITY, profiler=None):
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.width = width
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.buffers = FrameBuffers(profiler)
+        self._last_render = None
+
+    def ready(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self._last_render is None or now - self._last_render >= self.interval
+
+    def render(self, frame, now=None):
+        # BGR frame -> JPEG bytes, or None if it is too soon for another frame
+        now = time.monotonic() if now is None else now
+        if not self.ready(now):
+            return None
+        self._last_render = now
+
+        h, w = frame.shape[:2]
+        if self.width and w > self.width:
+            size = (self.width, int(h * self.width / w))
+            small = self.buffers.get("preview", (size[1], size[0]) + frame.shape[2:])
+            frame = cv2.resize(frame, size, dst=small, interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", frame, self.encode_params)
+        return jpeg.tobytes() if ok else None
+
+
+class StatThrottle:
+    # Decides whether a widget needs rewriting: only when its value changed by
+    # more than `tolerance`, and not more often than every `min_interval` seconds.
+    def __init__(self, min_interval=STATS_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._last = {}  # key -> (value, time pushed)
+
+    def should_update(self, key, value, tolerance=0.0, min_interval=None, now=None):
+        now = time.monotonic() if now is None else now
+        min_interval = self.min_interval if min_interval is None else min_interval
+
+        previous = self._last.get(key)
+        if previous is not None:
+            old_value, pushed_at = previous
+            if isinstance(value, (int, float)) and isinstance(old_value, (int, float)):
+                if abs(value - old_value) <= tolerance:
+                    return False
+            elif value == old_value:
+                return False
+            if now - pushed_at < min_interval:
+                return False
+
+        self._last[key] = (value, now)
+        return True
@@ -1,27 +1,52 @@
 import cv2
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import dlib
-from tensorflow.keras.models import load_model
 from imutils import face_utils
+from face_tracker import FaceTracker
+from presence import PresenceMonitor
+from model_utils import get_dlib_detector, get_face_cascade, get_emotion_model
+from profiling import NULL_PROFILER
+from buffers import FrameBuffers
+from landmark_features import landmark_features, posture_alert
+from frame_clock import FrameClock
+from frame_result import FrameResult, rect_to_box, DISTRACTED, DROWSY
 from config import (
     EYE_AR_THRESH, EYE_AR_CONSEC_FRAMES, MOUTH_AR_THRESH,
-    EMOTION_CLASSES, DISTRACTED_EMOTIONS
+    EMOTION_CLASSES, DISTRACTED_EMOTIONS, FACE_TRACKING, FACE_DETECT_EVERY_N,
+    PRO_PARALLEL_BRANCHES, PRO_BRANCH_WORKERS
 )
 
-class ProEstimator:
-    def __init__(self):
+# Small pool shared by all ProEstimators for the emotion branch
+_pool = None
+_pool_lock = threading.Lock()
+
+def _branch_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=PRO_BRANCH_WORKERS, thread_name_prefix="pro-branch")
+        return _pool
+
+class ProEstimator(FrameClock):
+    def __init__(self, tracking=FACE_TRACKING, parallel=PRO_PARALLEL_BRANCHES, profiler=None):
+        self.parallel = parallel
+        self.profiler = profiler or NULL_PROFILER  # per-stage timings (see profiling.py)
+        self.buffers = FrameBuffers(self.profiler)  # per-session scratch arrays
+        # Models come from the shared registry (loaded once per process)
         # 1. Dlib 
-        self.dlib_detector = dlib.get_frontal_face_detector()
-        self.dlib_predictor = dlib.shape_predictor("shape_predictor_68_face_landmarks.dat")
+        self.dlib_detector, self.dlib_predictor = get_dlib_detector()
+        self.face_tracker = FaceTracker(self.dlib_detector, detect_every=FACE_DETECT_EVERY_N if tracking else 1)
+        self.presence = PresenceMonitor(buffers=self.buffers)  # pauses the detectors while nobody is there
         (self.lStart, self.lEnd) = face_utils.FACIAL_LANDMARKS_IDXS["left_eye"]
         (self.rStart, self.rEnd) = face_utils.FACIAL_LANDMARKS_IDXS["right_eye"]
         (self.mStart, self.mEnd) = face_utils.FACIAL_LANDMARKS_IDXS["mouth"]
 
-        # 2. Emotion DL Model (Keras)
-        self.emotion_model = load_model("fer_model.h5") 
+        # 2. Emotion DL Model (see EMOTION_BACKEND in config.py; warmed up on load)
+        self.emotion_model = get_emotion_model()
         
-        # 3. Face detector for Emotion 
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # 3. Fallback face detector for Emotion (only used when dlib finds no face)
+        self.face_cascade = get_face_cascade()
         
         # 4. State variables
         self.eye_counter = 0
@@ -30,122 +55,237 @@ class ProEstimator:
         self.posture_alert = False
         self.emotion_alert = False
         self.current_emotion = "---"
+        self.emotion_scores = None
 
         # 5. Counters
         self.focused_seconds = 0
         self.drowsy_seconds = 0
         self.distracted_seconds = 0
+        self.last_timestamp = None
 
-    def eye_aspect_ratio(self, eye):
-        A = np.linalg.norm(eye[1]-eye[5])
-        B = np.linalg.norm(eye[2]-eye[4])
-        C = np.linalg.norm(eye[0]-eye[3])
-        if C == 0: return 0.3
-        return (A+B)/(2.0*C)
-
-    def mouth_aspect_ratio(self, mouth):
-        A = np.linalg.norm(mouth[2]-mouth[10])
-        B = np.linalg.norm(mouth[4]-mouth[8])
-        C = np.linalg.norm(mouth[0]-mouth[6])
-        if C == 0: return 0.0
-        return (A+B)/(2.0*C)
-
-    def process_frame(self, frame):
-        FRAME_TIME_DELTA = 1/30.0 # Assume ~30FPS
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        is_drowsy = False
-        is_distracted_by_posture_or_yawn = False
-        is_distracted_by_emotion = False
-        
-        # --- 1. Dlib Landmark Detection (for Drowsy/Yawn) ---
-        dlib_faces = self.dlib_detector(gray, 0)
-        
-        if len(dlib_faces) == 0:
-            is_distracted_by_posture_or_yawn = True # No face, bad posture
+    def emotion_box(self, face, frame_shape, shape_np=None):
+        # Crop box for the FER model: dlib face rectangle grown to cover the
+        # landmark hull (dlib's box cuts off the chin and brows), clipped to the frame.
+        # Without landmarks (parallel mode) the plain rectangle is used.
+        x1, y1, x2, y2 = face.left(), face.top(), face.right(), face.bottom()
+        if shape_np is not None:
+            lx, ly = shape_np.min(axis=0)
+            rx, ry = shape_np.max(axis=0)
+            x1, y1 = min(x1, int(lx)), min(y1, int(ly))
+            x2, y2 = max(x2, int(rx)), max(y2, int(ry))
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(frame_shape[1], x2), min(frame_shape[0], y2)
+        return x1, y1, x2 - x1, y2 - y1
+
+    def landmark_branch(self, gray, face, result):
+        # Eyes, mouth and posture; features go into `result`. Returns (is_drowsy, is_distracted)
+        if face is None:
             self.posture_alert = True
-        else:
-            face = dlib_faces[0]
+            return False, True # No face, bad posture
+
+        is_drowsy = False
+        is_distracted = False
+        with self.profiler.stage("landmarks"):
             shape = self.dlib_predictor(gray, face)
             shape_np = face_utils.shape_to_np(shape)
+        result.landmarks = shape_np
 
-            # Eye logic (Drowsy)
-            leftEye = shape_np[self.lStart:self.lEnd]
-            rightEye = shape_np[self.rStart:self.rEnd]
-            ear = (self.eye_aspect_ratio(leftEye) + self.eye_aspect_ratio(rightEye)) / 2.0
-            if ear < EYE_AR_THRESH:
-                self.eye_counter += 1
-                if self.eye_counter >= EYE_AR_CONSEC_FRAMES:
-                    is_drowsy = True
-                    self.blink_alert = True
-            else:
-                self.eye_counter = 0
-                self.blink_alert = False
-
-            # Mouth logic (Yawn)
-            mouth = shape_np[self.mStart:self.mEnd]
-            mar = self.mouth_aspect_ratio(mouth)
-            self.yawn_alert = mar > MOUTH_AR_THRESH
-            if self.yawn_alert:
-                is_distracted_by_posture_or_yawn = True
-
-            # Posture logic
-            nose = shape_np[30]
-            chin = shape_np[8]
-            posture_deviation = abs(nose[0] - chin[0])
-            self.posture_alert = (posture_deviation > 40 or nose[1] > chin[1])
-            if self.posture_alert:
-                is_distracted_by_posture_or_yawn = True
-
-            # Draw dlib landmarks
-            for (x,y) in np.concatenate([leftEye, rightEye, mouth]):
-                cv2.circle(frame, (x,y), 1, (0,255,0), -1)
-
-        # --- 2. Emotion Detection (for Distraction) ---
-        haar_faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        # EAR, MAR and posture in one pass (see landmark_features.py)
+        ear, mar, posture_deviation, nose_below_chin = landmark_features(shape_np)
+
+        # Eye logic (Drowsy)
+        if ear < EYE_AR_THRESH:
+            self.eye_counter += 1
+            if self.eye_counter >= EYE_AR_CONSEC_FRAMES:
+                is_drowsy = True
+                self.blink_alert = True
+        else:
+            self.eye_counter = 0
+            self.blink_alert = False
+
+        # Mouth logic (Yawn)
+        self.yawn_alert = mar > MOUTH_AR_THRESH
+        if self.yawn_alert:
+            is_distracted = True
+
+        # Posture logic
+        self.posture_alert = posture_alert(posture_deviation, nose_below_chin)
+        if self.posture_alert:
+            is_distracted = True
+
+        result.ear = ear
+        result.mar = mar
+        result.posture_deviation = int(posture_deviation)
+        return is_drowsy, is_distracted
+
+    def emotion_input(self, gray, emotion_box):
+        # FER model input for this frame: (face_pixels (1, 48, 48, 1) or None, emotion_box)
+        # The Haar cascade only runs when dlib found nothing. face_pixels is a
+        # reused buffer, valid until this estimator's next frame.
+        if emotion_box is None:
+            with self.profiler.stage("haar"):
+                haar_faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+            if len(haar_faces) > 0:
+                emotion_box = haar_faces[0] # Get first face
+
+        if emotion_box is None or emotion_box[2] == 0 or emotion_box[3] == 0:
+            return None, None
+
+        (x, y, w, h) = emotion_box
         
-        if len(haar_faces) == 0:
+        # Crop and prepare face for FER model
+        face_roi_gray = gray[y:y+h, x:x+w]
+        face_roi_resized = self.buffers.get("face48", (48, 48))
+        cv2.resize(face_roi_gray, (48, 48), dst=face_roi_resized, interpolation=cv2.INTER_AREA)
+        
+        # Normalize straight into the (1, 48, 48, 1) model input
+        face_pixels = self.buffers.get("face_input", (1, 48, 48, 1), np.float32)
+        face_pixels[0, :, :, 0] = face_roi_resized
+        face_pixels *= 1.0 / 255.0
+        return face_pixels, emotion_box
+
+    def apply_emotion(self, scores, emotion_box):
+        # Model scores for one face (or None) -> (is_distracted, emotion_box)
+        self.emotion_scores = scores
+        if scores is None:
             self.current_emotion = "---"
             self.emotion_alert = False
-        else:
-            (x, y, w, h) = haar_faces[0] # Get first face
-            
-            # Crop and prepare face for FER model
-            face_roi_gray = gray[y:y+h, x:x+w]
-            face_roi_resized = cv2.resize(face_roi_gray, (48, 48), interpolation=cv2.INTER_AREA)
-            
-            # Normalize and expand dims for model
-            face_pixels = face_roi_resized.astype('float32') / 255.0
-            face_pixels = np.expand_dims(face_pixels, axis=0)
-            face_pixels = np.expand_dims(face_pixels, axis=-1)
-            
-            # Predict emotion
+            return False, None
+
+        emotion_idx = np.argmax(scores)
+        self.current_emotion = EMOTION_CLASSES[emotion_idx]
+        
+        # Check if emotion is a distraction
+        self.emotion_alert = self.current_emotion in DISTRACTED_EMOTIONS
+        return self.emotion_alert, emotion_box
+
+    def emotion_branch(self, gray, emotion_box):
+        # Emotion model on the face crop. Returns (is_distracted, emotion_box)
+        face_pixels, emotion_box = self.emotion_input(gray, emotion_box)
+        if face_pixels is None:
+            return self.apply_emotion(None, None)
+
+        # Predict emotion
+        with self.profiler.stage("emotion_predict"):
             predictions = self.emotion_model.predict(face_pixels)
-            emotion_idx = np.argmax(predictions[0])
-            self.current_emotion = EMOTION_CLASSES[emotion_idx]
-            
-            # Check if emotion is a distraction
-            if self.current_emotion in DISTRACTED_EMOTIONS:
-                is_distracted_by_emotion = True
-                self.emotion_alert = True
-                color = (0, 0, 255) # Red
-            else:
-                is_distracted_by_emotion = False
-                self.emotion_alert = False
-                color = (255, 0, 0) # Blue
-            
-            # Draw emotion box and text
-            cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-            cv2.putText(frame, self.current_emotion, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        return self.apply_emotion(predictions[0], emotion_box)
+
+    def detect(self, frame, timestamp):
+        # (gray, face); gray is None when the idle presence check skipped the frame
+        with self.profiler.stage("presence"):
+            if not self.presence.should_detect(frame, timestamp):
+                return None, None
+        with self.profiler.stage("convert"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.buffers.get("gray", frame.shape[:2]))
+        # Full HOG scan only every few frames, tracked in between
+        with self.profiler.stage("detect"):
+            face = self.face_tracker.update(gray)
+        self.presence.update(face is not None, timestamp)
+        return gray, face
+
+    def process_frame(self, frame, timestamp=None):
+        # Analyses the frame without drawing on it; see draw()
+        frame_time_delta = self.frame_delta(timestamp)
+        
+        # --- 1. Face ---
+        gray, face = self.detect(frame, self.last_timestamp)
+        result = FrameResult(self.last_timestamp, frame_time_delta, rect_to_box(face) if face is not None else None)
+        result.idle = self.presence.idle
+
+        # --- 2. Landmark branch (Drowsy/Yawn/Posture) + Emotion branch (Distraction) ---
+        # The two branches only share the gray frame and touch separate state.
+        if result.idle:
+            # Nobody there: no landmarks, no Haar fallback, no emotion model
+            is_drowsy, is_distracted_by_posture_or_yawn = self.landmark_branch(gray, None, result)
+            is_distracted_by_emotion, emotion_box = self.apply_emotion(None, None)
+        elif self.parallel:
+            # Emotion runs on the pool while landmarks run here; the FER crop
+            # comes from the face rectangle since the landmarks aren't ready yet
+            # (opt-in, see PRO_PARALLEL_BRANCHES: not the hull crop used below)
+            emotion_box = self.emotion_box(face, gray.shape) if face is not None else None
+            emotion_future = _branch_pool().submit(self.emotion_branch, gray, emotion_box)
+            is_drowsy, is_distracted_by_posture_or_yawn = self.landmark_branch(gray, face, result)
+            is_distracted_by_emotion, emotion_box = emotion_future.result()
+        else:
+            is_drowsy, is_distracted_by_posture_or_yawn = self.landmark_branch(gray, face, result)
+            emotion_box = self.emotion_box(face, gray.shape, result.landmarks) if face is not None else None
+            is_distracted_by_emotion, emotion_box = self.emotion_branch(gray, emotion_box)
 
+        return self.finish(result, is_drowsy, is_distracted_by_posture_or_yawn,
+                           is_distracted_by_emotion, emotion_box)
+
+    # --- Split entry points: the emotion model call is left to the caller,
+    # so stream_server can batch it across many streams ---
+
+    def start_frame(self, frame, timestamp=None):
+        # Everything up to the emotion model call
+        frame_time_delta = self.frame_delta(timestamp)
+        gray, face = self.detect(frame, self.last_timestamp)
+        result = FrameResult(self.last_timestamp, frame_time_delta, rect_to_box(face) if face is not None else None)
+        result.idle = self.presence.idle
+        is_drowsy, is_distracted_by_posture_or_yawn = self.landmark_branch(gray, face, result)
+        if result.idle:
+            face_pixels, emotion_box = None, None  # no crop: the batch skips this stream
+        else:
+            emotion_box = self.emotion_box(face, gray.shape, result.landmarks) if face is not None else None
+            face_pixels, emotion_box = self.emotion_input(gray, emotion_box)
+        return PendingFrame(result, is_drowsy, is_distracted_by_posture_or_yawn, emotion_box, face_pixels)
+
+    def finish_frame(self, pending, emotion_scores):
+        # emotion_scores: this frame's row of the model output (None if no face crop)
+        is_distracted_by_emotion, emotion_box = self.apply_emotion(emotion_scores, pending.emotion_box)
+        return self.finish(pending.result, pending.is_drowsy, pending.is_distracted_by_posture_or_yawn,
+                           is_distracted_by_emotion, emotion_box)
+
+    def finish(self, result, is_drowsy, is_distracted_by_posture_or_yawn, is_distracted_by_emotion, emotion_box):
         # --- 3. Update Counters ---
         is_distracted = is_distracted_by_posture_or_yawn or is_distracted_by_emotion
         
         if is_drowsy:
-            self.drowsy_seconds += FRAME_TIME_DELTA
+            self.drowsy_seconds += result.frame_time_delta
+            result.state = DROWSY
         elif is_distracted:
-            self.distracted_seconds += FRAME_TIME_DELTA
+            self.distracted_seconds += result.frame_time_delta
+            result.state = DISTRACTED
         else:
-            self.focused_seconds += FRAME_TIME_DELTA
+            self.focused_seconds += result.frame_time_delta
+
+        if emotion_box is not None:
+            result.emotion = self.current_emotion
+            result.emotion_scores = self.emotion_scores
+            result.emotion_box = tuple(int(v) for v in emotion_box)
+        result.blink_alert = self.blink_alert
+        result.yawn_alert = self.yawn_alert
+        result.posture_alert = self.posture_alert
+        result.emotion_alert = self.emotion_alert
+        return result
+
+    def draw(self, frame, result):
+        # Eye/mouth landmarks and the emotion box, drawn in place; only for frames that are shown
+        with self.profiler.stage("draw"):
+            shape_np = result.landmarks
+            if shape_np is not None:
+                # Draw dlib landmarks
+                for part in (shape_np[self.lStart:self.lEnd], shape_np[self.rStart:self.rEnd],
+                             shape_np[self.mStart:self.mEnd]):
+                    for (x,y) in part:
+                        cv2.circle(frame, (int(x),int(y)), 1, (0,255,0), -1)
+
+            if result.emotion_box is not None:
+                (x, y, w, h) = result.emotion_box
+                color = (0, 0, 255) if result.emotion_alert else (255, 0, 0) # Red / Blue
+                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+                cv2.putText(frame, result.emotion, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        return frame
+
+
+class PendingFrame:
+    # State carried from start_frame to finish_frame
+    __slots__ = ("result", "is_drowsy", "is_distracted_by_posture_or_yawn", "emotion_box", "face_pixels")
 
-        return frame
\ No newline at end of file
+    def __init__(self, result, is_drowsy, is_distracted_by_posture_or_yawn, emotion_box, face_pixels):
+        self.result = result
+        self.is_drowsy = is_drowsy
+        self.is_distracted_by_posture_or_yawn = is_distracted_by_posture_or_yawn
+        self.emotion_box = emotion_box
+        self.face_pixels = face_pixels
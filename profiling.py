@@ -0,0 +1,190 @@
+import bisect
+import gc
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+
+class LatencyHistogram:
+    # Log-spaced buckets from 10 us to 100 s (20 per decade, ~12% wide):
+    # fixed memory however long the session runs, O(log n) per record.
+    def __init__(self, min_seconds=1e-5, max_seconds=100.0, buckets_per_decade=20):
+        n = int(math.ceil(math.log10(max_seconds / min_seconds) * buckets_per_decade))
+        self.edges = [min_seconds * 10 ** (i / buckets_per_decade) for i in range(n + 1)]
+        self.counts = [0] * (n + 2)  # [0] underflow, [n + 1] overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.edges, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        # Upper edge of the bucket holding the q-th percentile
+        if self.count == 0:
+            return 0.0
+        target = q / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target and c:
+                if i == 0:
+                    return self.edges[0]
+                if i > len(self.edges) - 1:
+                    return self.max
+                return min(self.edges[i], self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class _StageTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageProfiler:
+    # Per-stage latency histograms for the hot path:
+    #   with profiler.stage("detect"):
+    #       face = tracker.update(gray)
+    def __init__(self):
+        self.histograms = {}
+        self.counts = {}  # plain event counters, e.g. buffer allocations
+        self._lock = threading.Lock()
+        # (name, seconds) from callers that must not take the lock (GC
+        # callbacks can run on a thread that already holds it); folded in on read
+        self._deferred = deque()
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def counters(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def defer(self, name, seconds):
+        # Lock-free record(): deque.append is atomic
+        self._deferred.append((name, seconds))
+
+    def _drain_deferred(self):
+        # Caller holds the lock. A GC during this loop only appends to the deque.
+        while self._deferred:
+            name, seconds = self._deferred.popleft()
+            self._record(name, seconds)
+
+    def _record(self, name, seconds):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = LatencyHistogram()
+        hist.record(seconds)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._record(name, seconds)
+
+    def summary(self):
+        with self._lock:
+            self._drain_deferred()
+            return [
+                {
+                    "stage": name,
+                    "count": h.count,
+                    "mean_ms": round(h.mean * 1000, 2),
+                    "p50_ms": round(h.percentile(50) * 1000, 2),
+                    "p99_ms": round(h.percentile(99) * 1000, 2),
+                    "max_ms": round(h.max * 1000, 2),
+                }
+                for name, h in self.histograms.items()
+            ]
+
+    def dump(self, path, **meta):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"meta": meta, "stages": self.summary(), "counters": self.counters()}, f, indent=2)
+        return path
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    # Used when profiling is off: stage() costs one method call, nothing is stored
+    _timer = _NullTimer()
+
+    def stage(self, name):
+        return self._timer
+
+    def record(self, name, seconds):
+        pass
+
+    def defer(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def summary(self):
+        return []
+
+    def counters(self):
+        return {}
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class GcMonitor:
+    # Records garbage-collector pauses as "gc_gen<N>" stages of a profiler,
+    # so allocation churn on the hot path shows up next to the stage timings.
+    # A collection can start anywhere, including inside the profiler's own
+    # locked sections, so pauses go through the lock-free defer().
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._start = None
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.profiler.defer(f"gc_gen{info['generation']}", time.perf_counter() - self._start)
+            self._start = None
+
+    def start(self):
+        if self._callback not in gc.callbacks:
+            gc.callbacks.append(self._callback)
+        return self
+
+    def stop(self):
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
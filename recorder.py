@@ -0,0 +1,114 @@
+import json
+import os
+
+import numpy as np
+from config import RECORDINGS_DIR, RECORD_CHUNK_ROWS, RECORD_META_EVERY, EMOTION_CLASSES
+from frame_result import STATES
+
+# One fixed-size row per analysed frame (322 bytes)
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),  # source clock, seconds
+    ("frame_time_delta", "<f4"),  # seconds the frame was counted for
+    ("state", "u1"),  # index into STATES
+    ("flags", "u1"),  # frame_result.FLAG_* bits
+    ("face_box", "<i2", (4,)),  # x, y, w, h; -1 without a face
+    ("landmarks", "<i2", (68, 2)),  # 0 without a face
+    ("emotion_scores", "<f4", (len(EMOTION_CLASSES),)),  # NaN without an emotion crop
+])
+_STATE_CODES = {state: i for i, state in enumerate(STATES)}
+
+META_FILE = "meta.json"
+
+
+class LandmarkRecorder:
+    # Appends FrameResults to memory-mapped .npy chunk files in `path`:
+    # an append is a ~300 byte copy into mapped memory, the OS writes it back.
+    # meta.json holds the row count; it is rewritten every `meta_every` rows,
+    # when a chunk fills up and on close, so a crash loses at most `meta_every` rows.
+    # Not thread-safe: call append() from the analysis thread only, and close()
+    # once that thread has stopped.
+    def __init__(self, path, chunk_rows=RECORD_CHUNK_ROWS, meta_every=RECORD_META_EVERY):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.meta_every = meta_every
+        self.rows = 0
+        self.chunks = 0
+        self._chunk = None
+        self._pos = 0
+
+    @classmethod
+    def for_session(cls, start_time, username, root=RECORDINGS_DIR):
+        return cls(os.path.join(root, f"{username}_{start_time:%Y%m%d_%H%M%S}"))
+
+    def _next_chunk(self):
+        self._chunk = np.lib.format.open_memmap(
+            os.path.join(self.path, f"chunk_{self.chunks:05d}.npy"),
+            mode="w+", dtype=RECORD_DTYPE, shape=(self.chunk_rows,)
+        )
+        self.chunks += 1
+        self._pos = 0
+        self._write_meta()
+
+    def append(self, result):
+        if self._chunk is None or self._pos == self.chunk_rows:
+            self._next_chunk()
+        row = self._chunk[self._pos]  # structured scalar: a view into the mapped file
+
+        row["timestamp"] = result.timestamp or 0.0
+        row["frame_time_delta"] = result.frame_time_delta
+        row["state"] = _STATE_CODES[result.state]
+        row["flags"] = result.flags
+        if result.landmarks is not None:
+            row["landmarks"] = result.landmarks
+        row["face_box"] = result.face_box if result.face_box is not None else -1
+        row["emotion_scores"] = result.emotion_scores if result.emotion_scores is not None else np.nan
+
+        self._pos += 1
+        self.rows += 1
+        if self.rows % self.meta_every == 0:
+            self._write_meta()
+
+    def _write_meta(self):
+        meta = {"dtype": RECORD_DTYPE.descr, "chunk_rows": self.chunk_rows,
+                "chunks": self.chunks, "rows": self.rows, "emotion_classes": EMOTION_CLASSES}
+        tmp = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def close(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+        self._write_meta()
+        return self.path
+
+
+class Recording:
+    # Read side: chunks are opened memory-mapped, nothing is loaded up front
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.rows = self.meta["rows"]
+
+    def __len__(self):
+        return self.rows
+
+    def chunks(self):
+        # Memory-mapped record arrays, the last one trimmed to the rows written
+        remaining = self.rows
+        for i in range(self.meta["chunks"]):
+            if remaining <= 0:
+                return
+            chunk = np.load(os.path.join(self.path, f"chunk_{i:05d}.npy"), mmap_mode="r")
+            yield chunk[:remaining]
+            remaining -= len(chunk)
+
+    def field(self, name):
+        # One column for the whole session, e.g. field("landmarks") -> (rows, 68, 2)
+        parts = [chunk[name] for chunk in self.chunks()]
+        if not parts:
+            return np.empty((0,) + RECORD_DTYPE[name].shape, RECORD_DTYPE[name].base)
+        return np.concatenate(parts)
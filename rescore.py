@@ -0,0 +1,249 @@
+"""Re-score recorded sessions under other thresholds, without dlib or the FER model.
+
+    python rescore.py --ear 0.18:0.30:0.01 --consec 3,6,9 --mar 0.5,0.6,0.7 --posture 30,40,50 --top 10
+
+Works on the per-frame recordings (recorder.py, RECORD_LANDMARKS). Every
+threshold combination is evaluated for all frames at once with NumPy,
+following the estimators' rules: no face counts as distracted and leaves the
+eye counter and the blink / yawn flags as they were, drowsiness needs
+`consec` closed-eye face frames in a row, alerts fire once per cooldown.
+"""
+import argparse
+import itertools
+import os
+
+import numpy as np
+import db
+from alerts import ALERT_FLAGS
+from config import (
+    EYE_AR_THRESH, EYE_AR_CONSEC_FRAMES, MOUTH_AR_THRESH, POSTURE_MAX_DEVIATION,
+    DISTRACTED_EMOTIONS, EMOTION_CLASSES, ALERT_COOLDOWN
+)
+from landmark_features import landmark_features
+from frame_result import FLAG_FACE, STATES
+from recorder import Recording
+
+# Largest (settings x frames) block evaluated at once
+MAX_BLOCK_ELEMENTS = 1 << 24
+
+
+class FeatureSeries:
+    # Per-frame inputs of one session, in time order
+    def __init__(self, timestamp, frame_time_delta, has_face, ear, mar, posture_deviation,
+                 nose_below_chin, emotion_idx, recorded_state=None):
+        self.timestamp = timestamp
+        self.frame_time_delta = frame_time_delta
+        self.has_face = has_face
+        self.ear = ear  # values on face-less frames are ignored
+        self.mar = mar
+        self.posture_deviation = posture_deviation
+        self.nose_below_chin = nose_below_chin
+        self.emotion_idx = emotion_idx  # index into EMOTION_CLASSES, -1 without a crop
+        self.recorded_state = recorded_state  # state codes the live session produced
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def from_recording(cls, path):
+        rec = Recording(path)
+        flags = rec.field("flags")
+        has_face = (flags & FLAG_FACE).astype(bool)
+        n = len(flags)
+
+        ear = np.zeros(n)
+        mar = np.zeros(n)
+        posture_deviation = np.zeros(n)
+        nose_below_chin = np.zeros(n, bool)
+        if has_face.any():
+            # One batched pass over all face frames of the session
+            f_ear, f_mar, f_dev, f_below = landmark_features(rec.field("landmarks")[has_face])
+            ear[has_face], mar[has_face] = f_ear, f_mar
+            posture_deviation[has_face], nose_below_chin[has_face] = f_dev, f_below
+
+        scores = rec.field("emotion_scores")
+        has_scores = ~np.isnan(scores).any(axis=1)
+        emotion_idx = np.where(has_scores, np.nan_to_num(scores).argmax(axis=1), -1)
+
+        return cls(rec.field("timestamp"), rec.field("frame_time_delta").astype(np.float64), has_face,
+                   ear, mar, posture_deviation, nose_below_chin, emotion_idx, rec.field("state"))
+
+
+def make_grid(eye_ar_thresh=(EYE_AR_THRESH,), eye_ar_consec_frames=(EYE_AR_CONSEC_FRAMES,),
+              mouth_ar_thresh=(MOUTH_AR_THRESH,), posture_max_deviation=(POSTURE_MAX_DEVIATION,),
+              distracted_emotions=(DISTRACTED_EMOTIONS,)):
+    # Every combination of the given values -> dict of (K,) arrays (+ (K, 7) emotion mask)
+    combos = list(itertools.product(eye_ar_thresh, eye_ar_consec_frames, mouth_ar_thresh,
+                                    posture_max_deviation, range(len(distracted_emotions))))
+    ear_t, consec, mar_t, posture, emotion_set = (np.array(c) for c in zip(*combos))
+    masks = np.array([[name in emotions for name in EMOTION_CLASSES] for emotions in distracted_emotions])
+    return {
+        "eye_ar_thresh": ear_t.astype(np.float64),
+        "eye_ar_consec_frames": consec.astype(np.int64),
+        "mouth_ar_thresh": mar_t.astype(np.float64),
+        "posture_max_deviation": posture.astype(np.float64),
+        "distracted_emotions": [distracted_emotions[i] for i in emotion_set],
+        "emotion_mask": masks[emotion_set],
+    }
+
+
+def grid_size(grid):
+    return len(grid["eye_ar_thresh"])
+
+
+def _forward_fill(values, valid):
+    # values (K, F), valid (F,): frames that aren't valid repeat the last valid
+    # frame's value (False before the first one)
+    idx = np.maximum.accumulate(np.where(valid, np.arange(len(valid)), -1))
+    return values[:, np.maximum(idx, 0)] & (idx >= 0)
+
+
+def _closed_run_length(closed, has_face):
+    # Length of the closed-eye run each frame ends, counting face frames only
+    # (face-less frames neither extend nor reset it): the estimators' eye_counter
+    counted = closed & has_face
+    opened = ~closed & has_face
+    c = np.cumsum(counted, axis=1)
+    last_reset = np.maximum.accumulate(np.where(opened, c, 0), axis=1)
+    return c - last_reset
+
+
+def _count_alerts(flags, timestamp, cooldown):
+    # AlertTracker semantics per row of flags (K, F): a raised flag fires if
+    # more than `cooldown` seconds passed since that row last fired. Jumps from
+    # fire to fire, so the loop runs at most duration / cooldown times.
+    k, f = flags.shape
+    # nxt[:, i] = first raised frame >= i (f if none)
+    nxt = np.where(flags, np.arange(f), f)
+    nxt = np.minimum.accumulate(nxt[:, ::-1], axis=1)[:, ::-1]
+    nxt = np.concatenate([nxt, np.full((k, 1), f)], axis=1)
+
+    rows = np.arange(k)
+    counts = np.zeros(k, np.int64)
+    fired = nxt[:, 0]
+    while True:
+        active = fired < f
+        if not active.any():
+            return counts
+        counts += active
+        after = np.searchsorted(timestamp, timestamp[np.minimum(fired, f - 1)] + cooldown, side="right")
+        fired = np.where(active, nxt[rows, after], f)
+
+
+def _rescore_block(series, grid, cooldown):
+    has_face = series.has_face[np.newaxis]
+    col = lambda name: grid[name][:, np.newaxis]
+
+    closed = series.ear[np.newaxis] < col("eye_ar_thresh")
+    run = _closed_run_length(closed, has_face)
+    drowsy = has_face & (run >= col("eye_ar_consec_frames"))
+    # blink_alert / yawn_alert follow the last face frame (equals drowsy / yawn there)
+    blink_flag = _forward_fill(drowsy, series.has_face)
+
+    yawn = has_face & (series.mar[np.newaxis] > col("mouth_ar_thresh"))
+    yawn_flag = _forward_fill(yawn, series.has_face)
+    posture = has_face & ((series.posture_deviation[np.newaxis] > col("posture_max_deviation"))
+                          | series.nose_below_chin[np.newaxis])
+    has_emotion = series.emotion_idx >= 0
+    emotion = grid["emotion_mask"][:, np.maximum(series.emotion_idx, 0)] & has_emotion[np.newaxis]
+
+    distracted = ~drowsy & (~has_face | yawn | posture | emotion)
+    focused = ~drowsy & ~distracted
+    dt = series.frame_time_delta
+
+    alert_flags = {"blink": blink_flag, "yawn": yawn_flag}
+    out = {
+        "focused_seconds": focused @ dt,
+        "distracted_seconds": distracted @ dt,
+        "drowsy_seconds": drowsy @ dt,
+    }
+    for kind, _ in ALERT_FLAGS:
+        out[f"{kind}_alerts"] = _count_alerts(alert_flags[kind], series.timestamp, cooldown)
+    out["alerts"] = sum(out[f"{kind}_alerts"] for kind, _ in ALERT_FLAGS)
+    return out
+
+
+def rescore(series, grid, cooldown=ALERT_COOLDOWN):
+    # One session under every setting of the grid -> dict of (K,) arrays
+    k = grid_size(grid)
+    block = max(1, MAX_BLOCK_ELEMENTS // max(1, len(series)))
+    parts = []
+    for start in range(0, k, block):
+        sub = {name: values[start:start + block] for name, values in grid.items()}
+        parts.append(_rescore_block(series, sub, cooldown))
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+def rescore_sessions(series_list, grid, cooldown=ALERT_COOLDOWN):
+    # Totals over many sessions (each session starts with fresh estimator state)
+    totals = None
+    for series in series_list:
+        if len(series) == 0:
+            continue
+        result = rescore(series, grid, cooldown)
+        totals = result if totals is None else {name: totals[name] + result[name] for name in totals}
+    return totals
+
+
+def recorded_totals(series_list):
+    # Seconds per state as the live sessions counted them
+    totals = dict.fromkeys(STATES, 0.0)
+    for series in series_list:
+        for code, state in enumerate(STATES):
+            totals[state] += float(series.frame_time_delta[series.recorded_state == code].sum())
+    return totals
+
+
+def _values(spec, cast=float):
+    # "0.2,0.25" or "start:stop:step" (stop inclusive)
+    if ":" in spec:
+        start, stop, step = (float(v) for v in spec.split(":"))
+        return [cast(v) for v in np.arange(start, stop + step / 2, step)]
+    return [cast(v) for v in spec.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score recorded sessions under other thresholds")
+    parser.add_argument("recordings", nargs="*", help="recording directories (default: all in the sessions table)")
+    parser.add_argument("--ear", default=str(EYE_AR_THRESH), help="EYE_AR_THRESH values")
+    parser.add_argument("--consec", default=str(EYE_AR_CONSEC_FRAMES), help="EYE_AR_CONSEC_FRAMES values")
+    parser.add_argument("--mar", default=str(MOUTH_AR_THRESH), help="MOUTH_AR_THRESH values")
+    parser.add_argument("--posture", default=str(POSTURE_MAX_DEVIATION), help="POSTURE_MAX_DEVIATION values")
+    parser.add_argument("--emotions", action="append",
+                        help="comma-separated DISTRACTED_EMOTIONS set (repeatable; default: config)")
+    parser.add_argument("--cooldown", type=float, default=ALERT_COOLDOWN)
+    parser.add_argument("--top", type=int, default=10, help="settings to list, by focus %")
+    args = parser.parse_args(argv)
+
+    paths = args.recordings
+    if not paths:
+        db.init_db()
+        paths = [row[-1] for row in db.fetch_all() if row[-1]]
+    paths = [p for p in paths if os.path.isdir(p)]
+    if not paths:
+        print("No recordings found (enable RECORD_LANDMARKS in config.py).")
+        return None
+
+    series_list = [FeatureSeries.from_recording(p) for p in paths]
+    emotions = [set(e.split(",")) for e in args.emotions] if args.emotions else [DISTRACTED_EMOTIONS]
+    grid = make_grid(_values(args.ear), _values(args.consec, int), _values(args.mar),
+                     _values(args.posture), emotions)
+    totals = rescore_sessions(series_list, grid, args.cooldown)
+
+    frames = sum(len(s) for s in series_list)
+    recorded = recorded_totals(series_list)
+    print(f"{len(series_list)} sessions, {frames} frames, {grid_size(grid)} settings")
+    print("recorded: " + ", ".join(f"{state} {seconds:.0f}s" for state, seconds in recorded.items()))
+
+    total = totals["focused_seconds"] + totals["distracted_seconds"] + totals["drowsy_seconds"]
+    focus = np.divide(totals["focused_seconds"], total, out=np.zeros_like(total), where=total > 0)
+    print(f"{'ear':>6}{'consec':>7}{'mar':>6}{'posture':>8}  {'focus%':>7}{'distr s':>9}{'drowsy s':>9}{'alerts':>7}")
+    for i in np.argsort(-focus)[:args.top]:
+        print(f"{grid['eye_ar_thresh'][i]:6.2f}{grid['eye_ar_consec_frames'][i]:7d}{grid['mouth_ar_thresh'][i]:6.2f}"
+              f"{grid['posture_max_deviation'][i]:8.0f}  {focus[i] * 100:7.1f}{totals['distracted_seconds'][i]:9.0f}"
+              f"{totals['drowsy_seconds'][i]:9.0f}{totals['alerts'][i]:7d}")
+    return grid, totals
+
+
+if __name__ == "__main__":
+    main()
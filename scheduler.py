@@ -0,0 +1,65 @@
+from config import ANALYSIS_CPU_BUDGET, ANALYSIS_MAX_FPS, ANALYSIS_MIN_FPS, PRESENCE_IDLE_FPS
+
+
+class AdaptiveScheduler:
+    # Picks how often frames are analysed from the measured camera frame rate
+    # and process_frame latency, so analysis stays within a CPU budget:
+    #   interval >= latency / cpu_budget
+    # e.g. 80 ms per frame with a 0.5 budget -> at most one analysis every 160 ms.
+    # While the estimator is idle (nobody in view) it drops to idle_fps.
+    def __init__(self, cpu_budget=ANALYSIS_CPU_BUDGET, max_fps=ANALYSIS_MAX_FPS,
+                 min_fps=ANALYSIS_MIN_FPS, idle_fps=PRESENCE_IDLE_FPS, smoothing=0.2):
+        self.cpu_budget = cpu_budget
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.idle_fps = idle_fps
+        self.smoothing = smoothing
+        self.idle = False  # set by the analysis thread from each FrameResult
+
+        self.frame_interval = None  # smoothed camera frame interval (s)
+        self.process_time = None  # smoothed process_frame latency (s)
+        self._last_frame = None
+        self._last_offer = None
+
+    def _smooth(self, old, new):
+        if old is None:
+            return new
+        return old + self.smoothing * (new - old)
+
+    # Called by the capture thread for every frame
+    def record_frame(self, timestamp):
+        if self._last_frame is not None:
+            self.frame_interval = self._smooth(self.frame_interval, timestamp - self._last_frame)
+        self._last_frame = timestamp
+
+    # Called by the analysis thread after every process_frame
+    def record_latency(self, seconds):
+        self.process_time = self._smooth(self.process_time, seconds)
+
+    @property
+    def camera_fps(self):
+        return 1.0 / self.frame_interval if self.frame_interval else 0.0
+
+    @property
+    def analysis_interval(self):
+        interval = 1.0 / self.max_fps
+        if self.process_time is not None:
+            interval = max(interval, self.process_time / self.cpu_budget)
+        interval = min(interval, 1.0 / self.min_fps)
+        if self.idle:
+            interval = max(interval, 1.0 / self.idle_fps)
+        if self.frame_interval is not None:
+            interval = max(interval, self.frame_interval)  # can't beat the camera
+        return interval
+
+    @property
+    def analysis_fps(self):
+        return 1.0 / self.analysis_interval
+
+    def should_analyze(self, timestamp):
+        # Frames arrive at discrete times, so allow half a frame of slack
+        slack = (self.frame_interval or 0.0) / 2
+        if self._last_offer is None or timestamp - self._last_offer >= self.analysis_interval - slack:
+            self._last_offer = timestamp
+            return True
+        return False
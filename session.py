@@ -0,0 +1,146 @@
+from datetime import datetime
+
+import db
+from alerts import AlertTracker
+from capture import CapturePipeline
+from config import VIDEO_SOURCE, PROFILE_DIR, RECORD_LANDMARKS, TIMELINE, PREVIEW_FPS
+from profiling import StageProfiler, NULL_PROFILER
+from recorder import LandmarkRecorder
+from timeline import TimelineWriter
+from video_source import open_source
+
+
+def make_estimator(mode, profiler=None, **options):
+    # The one place estimators are built; options go to ProEstimator (e.g. parallel=False)
+    if mode == "pro":
+        from pro_detector import ProEstimator
+        return ProEstimator(profiler=profiler, **options)
+    from focus_detector import FocusEstimator
+    return FocusEstimator(profiler=profiler)
+
+
+class AlertSink:
+    # Pipeline sink: counts alerts on the analysis thread, so none are missed
+    # however rarely the front end looks. on_alert(kind, result) is called
+    # on that thread for every alert that fires.
+    def __init__(self, on_alert=None):
+        self.tracker = AlertTracker()
+        self.on_alert = on_alert
+
+    def append(self, result):
+        for kind in self.tracker.update(result, result.timestamp):
+            if self.on_alert is not None:
+                self.on_alert(kind, result)
+
+
+class StudySession:
+    # One live session without any UI: capture pipeline, estimator, alert /
+    # timeline / recording sinks, and the sessions row written on stop().
+    # Used by the headless runner and the live server.
+    def __init__(self, mode, source_spec=VIDEO_SOURCE, username="pundra_student", save=True, profile=False,
+                 on_alert=None, preview_fps=PREVIEW_FPS):
+        self.mode = mode
+        self.source_spec = source_spec
+        self.username = username
+        self.save = save
+        self.profiler = StageProfiler() if profile else None
+        self.alerts = AlertSink(on_alert)
+        self.preview_fps = preview_fps  # 0: nothing is shown, so no frames are decoded for display
+        self.source = None
+        self.estimator = None
+        self.pipeline = None
+        self.recorder = None
+        self.timeline = None
+        self.session_id = None
+        self.start_time = None
+        self.record = None
+
+    @property
+    def running(self):
+        return self.pipeline is not None
+
+    def start(self):
+        # False if the video source can't be opened. Any other failure (e.g. a
+        # missing model file) undoes what was set up so far and is re-raised.
+        self.source = open_source(self.source_spec)
+        if self.source is None:
+            return False
+
+        try:
+            self.start_time = datetime.now()
+            self.estimator = make_estimator(self.mode, self.profiler)
+            if RECORD_LANDMARKS:
+                self.recorder = LandmarkRecorder.for_session(self.start_time, self.username)
+            if self.save and TIMELINE:
+                self.session_id = db.begin_session(self.username, self.start_time.strftime("%Y-%m-%d %H:%M:%S"))
+                self.timeline = TimelineWriter(self.session_id)
+            sinks = [s for s in (self.alerts, self.recorder, self.timeline) if s is not None]
+
+            pipeline = CapturePipeline(self.source, self.estimator, profiler=self.profiler or NULL_PROFILER,
+                                       sinks=sinks, preview_fps=self.preview_fps)
+            pipeline.start()
+        except Exception:
+            self._abort()
+            raise
+        self.pipeline = pipeline
+        return True
+
+    def _abort(self):
+        # Undoes a failed start(): the device is freed and nothing is saved
+        self.source.release()
+        if self.timeline is not None:
+            self.timeline.close()
+            self.timeline = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.session_id is not None:
+            db.discard_session(self.session_id)
+            self.session_id = None
+
+    def stats(self):
+        e = self.estimator
+        total = e.focused_seconds + e.distracted_seconds + e.drowsy_seconds
+        return {
+            "focus_percent": round(e.focused_seconds / max(1, total) * 100, 1),
+            "focused_seconds": round(e.focused_seconds, 2),
+            "distracted_seconds": round(e.distracted_seconds, 2),
+            "drowsy_seconds": round(e.drowsy_seconds, 2),
+            "alerts": self.alerts.tracker.total,
+            "analysis_fps": round(self.pipeline.scheduler.analysis_fps, 1),
+            "latency_ms": round(self.pipeline.latency * 1000),
+            "idle": self.pipeline.scheduler.idle,
+        }
+
+    def stop(self):
+        # Stops the threads and saves the session; returns its record
+        if self.pipeline is None:
+            return self.record
+        # Sinks are closed only once the analysis thread has exited (see CapturePipeline.stop)
+        stopped = self.pipeline.stop(timeout=10.0)
+        self.pipeline = None
+        self.source.release()
+
+        e = self.estimator
+        self.record = {
+            "username": self.username,
+            "start_time": self.start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "focused_seconds": int(e.focused_seconds),
+            "distracted_seconds": int(e.distracted_seconds),
+            "drowsy_seconds": int(e.drowsy_seconds),
+            "alerts": self.alerts.tracker.total,
+            "recording": self.recorder.path if self.recorder is not None else None,
+        }
+        if self.recorder is not None and stopped:
+            self.recorder.close()
+        if self.timeline is not None and stopped:
+            self.timeline.close()
+        if self.save:
+            if self.session_id is not None:
+                db.end_session(self.session_id, self.record)
+            else:
+                db.insert_session(self.record)
+        if self.profiler is not None and PROFILE_DIR:
+            self.profiler.dump(f"{PROFILE_DIR}/session_{self.start_time:%Y%m%d_%H%M%S}.json", mode=self.mode)
+        return self.record
@@ -0,0 +1,72 @@
+import importlib
+import subprocess
+import sys
+import threading
+import time
+
+# Import and model-load cost, as measured inside this process:
+# (kind, name) -> seconds, where kind is "import" or "model"
+_timings = {}
+_lock = threading.Lock()
+
+# Modules worth checking with `python startup_report.py`
+APP_MODULES = [
+    "numpy", "cv2", "dlib", "pandas", "streamlit", "tensorflow",
+    "config", "db", "capture", "focus_detector", "pro_detector", "emotion_backend",
+]
+
+
+def record(kind, name, seconds):
+    with _lock:
+        _timings[(kind, name)] = seconds
+
+
+def timed_import(module_name):
+    # Import on first use and remember how long it took; later calls are free
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    record("import", module_name, time.perf_counter() - start)
+    return module
+
+
+def report():
+    with _lock:
+        rows = [{"kind": kind, "name": name, "seconds": round(seconds, 4)}
+                for (kind, name), seconds in _timings.items()]
+    return sorted(rows, key=lambda r: r["seconds"], reverse=True)
+
+
+def cold_import_time(module_name):
+    # Each module in a fresh interpreter, so its full dependency chain is counted
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module_name}; print(time.perf_counter() - t)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    print("Cold import time per module")
+    for name in APP_MODULES:
+        seconds = cold_import_time(name)
+        shown = "not installed / failed" if seconds is None else f"{seconds * 1000:8.1f} ms"
+        print(f"  {name:<18}{shown}")
+
+    if "--models" in sys.argv:
+        import model_utils
+
+        print("\nModel load time")
+        for loader in (model_utils.get_dlib_detector, model_utils.get_face_cascade, model_utils.get_emotion_model):
+            try:
+                loader()
+            except Exception as e:
+                print(f"  {loader.__name__}: failed ({e})")
+        for row in report():
+            if row["kind"] == "model":
+                print(f"  {row['name']:<18}{row['seconds'] * 1000:8.1f} ms")
@@ -0,0 +1,303 @@
+"""Many study stations in one process, sharing one copy of every model.
+
+    python stream_server.py --file desk1.mp4 --file desk2.mp4 --listen 127.0.0.1:9000 --duration 600
+
+Stations are video files or socket clients (video_source.send_frame). Each
+stream keeps only its own estimator state; once per tick the face crops of
+all streams go through the emotion model in a single batched call.
+"""
+import argparse
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import db
+from alerts import AlertTracker
+from capture import LatestValue
+from config import SERVER_TICK_FPS, SERVER_WORKERS
+from session import make_estimator
+from video_source import FileSource, SocketSource
+
+
+class StreamReader(threading.Thread):
+    # Drains one source and decodes at most one frame per decode_interval of
+    # its timestamps. A lossless reader (files read faster than real time)
+    # waits for the tick to take each decoded frame instead of overwriting it,
+    # so analysed frames stay one decode_interval of media time apart.
+    def __init__(self, source, decode_interval, lossless=False):
+        super().__init__(daemon=True)
+        self.source = source
+        self.decode_interval = decode_interval
+        self.lossless = lossless
+        self.latest = LatestValue()  # (timestamp, frame)
+        self.finished = False
+        self._stop_event = threading.Event()
+        self._taken = threading.Event()
+
+    def run(self):
+        last_decoded = None
+        try:
+            while not self._stop_event.is_set():
+                if not self.source.grab():
+                    break
+                timestamp = self.source.timestamp
+                if last_decoded is not None and timestamp - last_decoded < self.decode_interval:
+                    continue
+                ok, frame = self.source.retrieve()
+                if not ok:
+                    break
+                last_decoded = timestamp
+                self.latest.set((timestamp, frame))
+                if self.lossless:
+                    self._taken.wait()
+                    self._taken.clear()
+        finally:
+            self.finished = True
+            self.source.release()
+
+    def take(self):
+        # Called by the tick once it has the latest frame
+        self._taken.set()
+
+    def wait_for_frame(self, seq, poll=0.1):
+        # Blocks until there is a frame newer than `seq` or the reader has finished
+        while not self.finished and not self._stop_event.is_set():
+            newer, _ = self.latest.wait_newer(seq, poll)
+            if newer != seq:
+                return
+
+    def stop(self):
+        self._stop_event.set()
+        self._taken.set()
+
+
+class Station:
+    # Per-stream state only: the estimator's models come from the shared registry.
+    # `name` identifies the stream (file path, client address); `username` is
+    # who the session row belongs to.
+    def __init__(self, name, source, mode, decode_interval, username="pundra_student", lossless=False):
+        self.estimator = make_estimator(mode, parallel=False)
+        self.name = name
+        self.username = username
+        self.alerts = AlertTracker()
+        self.reader = StreamReader(source, decode_interval, lossless)
+        self.seen_seq = 0
+        self.analysed = 0
+        self.start_time = datetime.now()
+        self.end_time = None
+        self.error = None  # exception that ended this station early
+
+    def fail(self, error):
+        # Ends this station only; the other streams keep being analysed
+        self.error = error
+        self.end_time = datetime.now()
+        self.reader.stop()
+
+    def session_record(self):
+        e = self.estimator
+        return {
+            "username": self.username,
+            "start_time": self.start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": (self.end_time or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
+            "focused_seconds": int(e.focused_seconds),
+            "distracted_seconds": int(e.distracted_seconds),
+            "drowsy_seconds": int(e.drowsy_seconds),
+            "alerts": self.alerts.total,
+        }
+
+
+class StreamServer:
+    def __init__(self, mode="pro", tick_fps=SERVER_TICK_FPS, workers=SERVER_WORKERS, username="pundra_student"):
+        self.mode = mode
+        self.username = username  # owner of every station's session row
+        self.tick_interval = 1.0 / tick_fps
+        self.stations = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="station")
+        self._listener = None
+        self._stop_event = threading.Event()
+        if mode == "pro":
+            from model_utils import get_emotion_model
+            self.emotion_model = get_emotion_model()
+
+        # Stats
+        self.ticks = 0
+        self.frames = 0
+        self.batches = 0
+        self.inferences = 0
+
+    def add_stream(self, name, source, lossless=False):
+        # lossless: for sources faster than real time (FileSource(realtime=False));
+        # the tick waits for every frame instead of skipping ahead by wall time
+        station = Station(name, source, self.mode, self.tick_interval, self.username, lossless)
+        with self._lock:
+            self.stations[name] = station
+        station.reader.start()
+        return station
+
+    def live_stations(self):
+        with self._lock:
+            return [s for s in self.stations.values() if s.end_time is None]
+
+    def tick(self):
+        # One analysis step over every stream with a new frame
+        ready = []
+        for station in self.live_stations():
+            if station.reader.lossless:
+                station.reader.wait_for_frame(station.seen_seq)
+            seq, item = station.reader.latest.get()
+            if seq != station.seen_seq and item is not None:
+                station.seen_seq = seq
+                station.reader.take()
+                ready.append((station, item))
+            elif station.reader.finished:
+                station.end_time = datetime.now()
+        if not ready:
+            return 0
+
+        if self.mode == "pro":
+            # Landmarks per stream on the pool, then one emotion call for all crops
+            pending = list(self._pool.map(
+                lambda job: self._guarded(job[0], job[0].estimator.start_frame, job[1][1], job[1][0]), ready))
+            has_crop = [p is not None and p.face_pixels is not None for p in pending]  # None: station failed
+            crops = [p.face_pixels for p, crop in zip(pending, has_crop) if crop]
+            scores = iter(())
+            if crops:
+                scores = iter(self.emotion_model.predict(np.concatenate(crops)))
+                self.batches += 1
+                self.inferences += len(crops)
+            for (station, _), p, crop in zip(ready, pending, has_crop):
+                if p is not None:
+                    self._guarded(station, station.estimator.finish_frame, p, next(scores) if crop else None)
+        else:
+            list(self._pool.map(
+                lambda job: self._guarded(job[0], job[0].estimator.process_frame, job[1][1], job[1][0]), ready))
+
+        for station, (timestamp, _) in ready:
+            if station.error is not None:
+                continue
+            station.alerts.update(station.estimator, timestamp)
+            station.analysed += 1
+        self.ticks += 1
+        self.frames += len(ready)
+        return len(ready)
+
+    @staticmethod
+    def _guarded(station, fn, *args):
+        # fn(*args) for one station; an exception ends that station only (-> None)
+        try:
+            return fn(*args)
+        except Exception as e:
+            station.fail(e)
+            return None
+
+    def listen(self, host, port):
+        # Each client connection becomes a station named after its address
+        self._listener = socket.create_server((host, port))
+        self._listener.settimeout(0.5)
+
+        def accept_loop():
+            while not self._stop_event.is_set():
+                try:
+                    conn, addr = self._listener.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                conn.settimeout(None)
+                self.add_stream(f"{addr[0]}:{addr[1]}", SocketSource(conn))
+
+        threading.Thread(target=accept_loop, daemon=True).start()
+
+    def run(self, duration=None):
+        # Ticks until `duration` passes, or (without a listener) all streams end
+        started = time.monotonic()
+        next_tick = started
+        while not self._stop_event.is_set():
+            self.tick()
+            if duration is not None and time.monotonic() - started >= duration:
+                break
+            live = self.live_stations()
+            if self._listener is None and not live:
+                break
+            if any(s.reader.lossless for s in live):
+                continue  # the tick itself waits for the lossless readers
+            next_tick += self.tick_interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # running behind: don't try to catch up
+
+    def stop(self):
+        self._stop_event.set()
+        if self._listener is not None:
+            self._listener.close()
+        for station in list(self.stations.values()):
+            station.reader.stop()
+            if station.end_time is None:
+                station.end_time = datetime.now()
+        self._pool.shutdown(wait=True)
+
+    def summary(self):
+        return {
+            "ticks": self.ticks,
+            "frames": self.frames,
+            "batches": self.batches,
+            "inferences": self.inferences,
+            "mean_batch": round(self.inferences / self.batches, 2) if self.batches else 0.0,
+            "stations": {s.name: dict(s.session_record(), analysed=s.analysed) for s in self.stations.values()},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse several study stations in one process")
+    parser.add_argument("--file", action="append", default=[], help="video file station (repeatable)")
+    parser.add_argument("--fast", action="store_true",
+                        help="read files as fast as the analysis keeps up instead of at their own frame rate")
+    parser.add_argument("--listen", metavar="HOST:PORT", help="accept socket stations")
+    parser.add_argument("--mode", choices=["normal", "pro"], default="pro")
+    parser.add_argument("--tick-fps", type=float, default=SERVER_TICK_FPS)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--duration", type=float, help="seconds to run (default: until all files end)")
+    parser.add_argument("--save", action="store_true", help="store one session per station")
+    parser.add_argument("--username", default="pundra_student", help="user the saved sessions belong to")
+    args = parser.parse_args(argv)
+
+    server = StreamServer(args.mode, args.tick_fps, args.workers, args.username)
+    for path in args.file:
+        server.add_stream(path, FileSource(path, realtime=not args.fast), lossless=args.fast)
+    if args.listen:
+        host, _, port = args.listen.rpartition(":")
+        server.listen(host or "127.0.0.1", int(port))
+
+    started = time.perf_counter()
+    try:
+        server.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        # Saved even if run() failed: every station's time so far is real
+        if args.save and server.stations:
+            db.init_db()
+            db.insert_sessions([s.session_record() for s in server.stations.values()])
+    elapsed = time.perf_counter() - started
+
+    summary = server.summary()
+    for name, s in summary["stations"].items():
+        print(f"{name}: {s['analysed']} frames, focused {s['focused_seconds']}s, "
+              f"distracted {s['distracted_seconds']}s, drowsy {s['drowsy_seconds']}s, alerts {s['alerts']}")
+    for station in server.stations.values():
+        if station.error is not None:
+            print(f"{station.name}: stopped early: {station.error!r}")
+    print(f"{summary['frames']} frames in {elapsed:.1f}s ({summary['frames'] / max(elapsed, 1e-9):.1f}/s), "
+          f"{summary['inferences']} emotion inferences in {summary['batches']} batches "
+          f"(mean batch {summary['mean_batch']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    # A fresh study_sessions.db for one test; yields the shared connection
+    import db
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(db, "_conn", None)
+    db.init_db()
+    yield db.get_connection()
+    db.get_connection().close()
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("cv2")
+
+from alerts import merge_alert_events
+from batch_analyze import chunk_ranges
+
+
+@pytest.mark.parametrize("frame_count, fps, chunk_seconds, analysis_fps, stride, ranges", [
+    # one full chunk
+    (9000, 30, 300, 5, 6, [(0, 9000)]),
+    # one frame over: a last partial chunk of one frame
+    (9001, 30, 300, 5, 6, [(0, 9000), (9000, 9001)]),
+    (20000, 30, 300, 5, 6, [(0, 9000), (9000, 18000), (18000, 20000)]),
+    # 25 fps at 10/s: stride 2, chunks rounded up to 26 frames so starts stay on the stride
+    (100, 25, 1, 10, 2, [(0, 26), (26, 52), (52, 78), (78, 100)]),
+    # analysis faster than the video: every frame
+    (10, 30, 300, 60, 1, [(0, 10)]),
+    # unknown length
+    (0, 30, 300, 5, 6, [(0, None)]),
+])
+def test_chunk_ranges(frame_count, fps, chunk_seconds, analysis_fps, stride, ranges):
+    assert chunk_ranges(frame_count, fps, chunk_seconds, analysis_fps) == (stride, ranges)
+
+
+@pytest.mark.parametrize("frame_count, fps, chunk_seconds", [(9001, 30, 300), (100, 25, 1), (1234, 29.97, 7)])
+def test_chunks_analyse_the_frames_of_one_long_run(frame_count, fps, chunk_seconds):
+    stride, ranges = chunk_ranges(frame_count, fps, chunk_seconds, 5)
+    analysed = [i for start, end in ranges for i in range(start, end, stride)]
+    assert analysed == list(range(0, frame_count, stride))
+
+
+@pytest.mark.parametrize("event_lists, total, by_kind", [
+    # the same alert on both sides of a boundary, within the cooldown: once
+    ([[(295.0, "blink")], [(301.0, "blink")]], 1, {"blink": 1}),
+    # ...and further apart than the cooldown: twice
+    ([[(295.0, "blink")], [(306.0, "blink")]], 2, {"blink": 2}),
+    # exactly the cooldown apart does not fire again
+    ([[(290.0, "yawn")], [(300.0, "yawn")]], 1, {"yawn": 1}),
+    # kinds don't suppress each other
+    ([[(295.0, "blink")], [(300.0, "yawn")]], 2, {"blink": 1, "yawn": 1}),
+    # the second chunk's own tracker fired at 301 and 312; merged, 312 is 17 s after 295
+    ([[(295.0, "blink")], [(301.0, "blink"), (312.0, "blink")]], 2, {"blink": 2}),
+    # a short last chunk, and chunks handed back out of order
+    ([[(300.0, "yawn")], [(0.0, "blink"), (20.0, "blink")], [(305.0, "yawn")]], 3, {"blink": 2, "yawn": 1}),
+    ([[], []], 0, {}),
+])
+def test_merge_alert_events(event_lists, total, by_kind):
+    assert merge_alert_events(event_lists, cooldown=10.0) == (total, by_kind)
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from capture import CapturePipeline, DropOldestQueue
+from frame_clock import FrameClock
+from scheduler import AdaptiveScheduler
+from video_source import SyntheticSource
+
+
+class _Result:
+    idle = False
+
+    def __init__(self, timestamp):
+        self.timestamp = timestamp
+
+
+class SlowEstimator(FrameClock):
+    def process_frame(self, frame, timestamp=None):
+        time.sleep(0.01)
+        return _Result(timestamp)
+
+
+def run_pipeline(preview_fps, seconds=10, fps=30, realtime=False):
+    source = SyntheticSource(count=seconds * fps, width=64, height=48, fps=fps, realtime=realtime)
+    scheduler = AdaptiveScheduler(cpu_budget=1.0, max_fps=1, min_fps=1)
+    pipeline = CapturePipeline(source, SlowEstimator(), scheduler=scheduler, preview_fps=preview_fps)
+    shown = []
+    pipeline.start()
+    seq = 0
+    while not pipeline.failed:
+        seq, item = pipeline.wait_for_frame(seq, timeout=0.1)
+        if item is not None:
+            shown.append(item)
+    assert pipeline.stop()
+    return pipeline, shown
+
+
+def test_preview_runs_at_preview_fps_not_the_analysis_rate():
+    pipeline, _ = run_pipeline(preview_fps=10)
+    # 10 s of media: about 10 analysed frames (max_fps=1) but about 100 shown
+    assert pipeline.worker.processed <= 11
+    assert 90 <= pipeline.display.seq <= 101
+
+
+def test_preview_frames_carry_the_newest_verdict():
+    _, shown = run_pipeline(preview_fps=10, seconds=2, realtime=True)
+    results = [result for _, _, result in shown if result is not None]
+    assert results
+    assert all(result.timestamp <= timestamp for timestamp, _, result in shown if result is not None)
+
+
+def test_no_preview_decodes_only_analysed_frames():
+    pipeline, _ = run_pipeline(preview_fps=0)
+    assert pipeline.display.seq == 0
+    assert pipeline.grabber.decoded_count <= 11
+
+
+def test_drop_oldest_queue_keeps_the_newest_items():
+    queue = DropOldestQueue(maxsize=2)
+    for item in range(5):
+        queue.put(item)
+    assert queue.dropped == 3
+    assert [queue.get(timeout=0), queue.get(timeout=0)] == [3, 4]
+    assert queue.get(timeout=0) is None
+
+
+def test_drop_oldest_queue_counts_only_overflow():
+    queue = DropOldestQueue(maxsize=2)
+    queue.put("a")
+    assert queue.get(timeout=0) == "a"
+    queue.put("b")
+    queue.put("c")
+    assert queue.dropped == 0
+
+
+def test_drop_oldest_queue_close_wakes_getters():
+    queue = DropOldestQueue()
+    queue.close()
+    assert queue.get(timeout=5) is None
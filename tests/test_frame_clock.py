@@ -0,0 +1,22 @@
+import pytest
+
+from config import MAX_FRAME_GAP
+from frame_clock import FrameClock
+
+
+def test_first_frame_counts_nothing():
+    assert FrameClock().frame_delta(10.0) == 0.0
+
+
+def test_delta_between_frames():
+    clock = FrameClock()
+    clock.frame_delta(10.0)
+    assert clock.frame_delta(10.25) == pytest.approx(0.25)
+    assert clock.last_timestamp == 10.25
+
+
+def test_gaps_are_clipped():
+    clock = FrameClock()
+    clock.frame_delta(0.0)
+    assert clock.frame_delta(60.0) == MAX_FRAME_GAP
+    assert clock.frame_delta(59.0) == 0.0  # timestamps going backwards count nothing
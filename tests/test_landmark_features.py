@@ -0,0 +1,79 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from landmark_features import landmark_features, posture_alert
+
+
+def eye_aspect_ratio(eye):
+    # The per-point formula the estimators used before landmark_features
+    A = np.linalg.norm(eye[1] - eye[5])
+    B = np.linalg.norm(eye[2] - eye[4])
+    C = np.linalg.norm(eye[0] - eye[3])
+    return (A + B) / (2.0 * C) if C != 0 else 0.3
+
+
+def mouth_aspect_ratio(mouth):
+    A = np.linalg.norm(mouth[2] - mouth[10])
+    B = np.linalg.norm(mouth[4] - mouth[8])
+    C = np.linalg.norm(mouth[0] - mouth[6])
+    return (A + B) / (2.0 * C) if C != 0 else 0.0
+
+
+def reference(shape):
+    ear = (eye_aspect_ratio(shape[36:42]) + eye_aspect_ratio(shape[42:48])) / 2.0
+    mar = mouth_aspect_ratio(shape[48:68])
+    nose, chin = shape[30], shape[8]
+    return ear, mar, abs(nose[0] - chin[0]), nose[1] > chin[1]
+
+
+def hand_made_shape():
+    shape = np.zeros((68, 2))
+    # Right eye: width 4, both openings 2 -> EAR 0.5
+    shape[36:42] = [(0, 0), (1, -1), (3, -1), (4, 0), (3, 1), (1, 1)]
+    # Left eye: width 4, openings 1 and 3 -> EAR 0.5
+    shape[42:48] = [(10, 0), (11, -0.5), (13, -1.5), (14, 0), (13, 1.5), (11, 0.5)]
+    # Mouth: width 10, openings 4 and 6 -> MAR 0.5
+    shape[48], shape[54] = (0, 20), (10, 20)
+    shape[50], shape[58] = (3, 18), (3, 22)
+    shape[52], shape[56] = (7, 17), (7, 23)
+    shape[30], shape[8] = (5, 10), (50, 30)  # nose 45 px off the chin, above it
+    return shape
+
+
+def test_hand_computed_values():
+    ear, mar, deviation, below = landmark_features(hand_made_shape())
+    assert ear == pytest.approx(0.5)
+    assert mar == pytest.approx(0.5)
+    assert deviation == 45.0
+    assert below is False
+    assert posture_alert(deviation, below, max_deviation=40)
+    assert not posture_alert(deviation, below, max_deviation=50)
+
+
+def test_zero_width_eyes_and_mouth():
+    ear, mar, _, _ = landmark_features(np.zeros((68, 2)))
+    assert (ear, mar) == (0.3, 0.0)
+
+
+def test_batch_matches_per_point_formulas():
+    rng = np.random.default_rng(1)
+    shapes = rng.integers(0, 480, (50, 68, 2))
+    shapes[0, 39] = shapes[0, 36]  # one degenerate eye
+    shapes[1, 54] = shapes[1, 48]  # and one degenerate mouth
+    ear, mar, deviation, below = landmark_features(shapes)
+    expected = np.array([reference(s.astype(np.float64)) for s in shapes])
+    np.testing.assert_allclose(ear, expected[:, 0])
+    np.testing.assert_allclose(mar, expected[:, 1])
+    np.testing.assert_array_equal(deviation, expected[:, 2])
+    np.testing.assert_array_equal(below, expected[:, 3].astype(bool))
+
+
+def test_single_face_returns_scalars():
+    shape = np.random.default_rng(2).integers(0, 480, (68, 2))
+    ear, mar, deviation, below = landmark_features(shape)
+    assert all(isinstance(v, float) for v in (ear, mar, deviation))
+    assert isinstance(below, bool)
+    expected = reference(shape.astype(np.float64))
+    assert ear == pytest.approx(expected[0])
+    assert mar == pytest.approx(expected[1])
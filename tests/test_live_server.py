@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("cv2")
+
+import live_server
+from live_server import LiveServer
+
+
+async def _viewer_leaves(monkeypatch):
+    monkeypatch.setattr(live_server, "VIEWER_CHECK_SECONDS", 0.05)
+    app = LiveServer(save=False)
+    server = await asyncio.start_server(app.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /stream.mjpg HTTP/1.1\r\nHost: test\r\n\r\n")
+        await writer.drain()
+        assert b"200" in await reader.readline()
+        await asyncio.sleep(0.1)
+        assert app.frames.viewers == 1
+
+        # No frames are published, so the stream only finds out by checking
+        writer.close()
+        await writer.wait_closed()
+        for _ in range(50):
+            if app.frames.viewers == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert app.frames.viewers == 0
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_stream_notices_a_viewer_that_left_while_no_frames_came(monkeypatch):
+    asyncio.run(asyncio.wait_for(_viewer_leaves(monkeypatch), 10))
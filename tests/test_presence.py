@@ -0,0 +1,106 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from frame_clock import FrameClock
+from presence import PresenceMonitor
+from scheduler import AdaptiveScheduler
+
+EMPTY = np.full((120, 160, 3), 100, np.uint8)  # the desk with nobody there
+PERSON = EMPTY.copy()
+PERSON[20:100, 50:110] = 220
+
+
+def make_monitor():
+    return PresenceMonitor(idle_after=20.0, motion_thresh=6.0, probe_seconds=5.0)
+
+
+def test_enters_idle_after_idle_after_seconds_without_a_face():
+    presence = make_monitor()
+    presence.update(True, 0.0)
+    presence.update(False, 19.9)
+    assert not presence.idle
+    presence.update(False, 20.0)
+    assert presence.idle
+    assert presence.idle_periods == 1
+    presence.update(False, 40.0)  # still the same idle period
+    assert presence.idle_periods == 1
+
+
+def test_countdown_starts_with_the_session():
+    presence = make_monitor()
+    presence.update(False, 5.0)
+    presence.update(False, 24.9)
+    assert not presence.idle
+    presence.update(False, 25.0)
+    assert presence.idle
+
+
+def test_detects_every_frame_while_not_idle():
+    presence = make_monitor()
+    assert all(presence.should_detect(EMPTY, t) for t in (0.0, 0.1, 0.2))
+    assert presence.skipped_frames == 0
+
+
+def test_idle_skips_still_frames_and_probes():
+    presence = make_monitor()
+    presence.update(False, 0.0)
+    presence.update(False, 20.0)
+    detected = [t for t in np.arange(20.5, 30.5, 0.5) if presence.should_detect(EMPTY, t)]
+    assert detected == [25.0, 30.0]  # probe_seconds after entering idle, then after each probe
+    assert presence.skipped_frames == 18
+
+
+def test_motion_wakes_the_detector_and_a_face_ends_idle():
+    presence = make_monitor()
+    presence.update(False, 0.0)
+    presence.update(False, 20.0)
+    assert not presence.should_detect(EMPTY, 20.5)
+    assert presence.should_detect(PERSON, 21.0)  # motion
+    presence.update(False, 21.0)  # moved, but no face yet
+    assert presence.idle
+    assert not presence.should_detect(PERSON, 21.5)  # same picture again: still
+    assert presence.should_detect(EMPTY, 22.0)
+    presence.update(True, 22.0)
+    assert not presence.idle
+    assert presence.idle_periods == 1
+
+
+def run_desk(leave_at, back_at, end):
+    # Drives the monitor the way the estimators and the capture pipeline do:
+    # frames arrive every scheduler.analysis_interval, each counted for
+    # frame_delta seconds as focused (face) or distracted (no face / skipped).
+    presence = make_monitor()
+    clock = FrameClock()
+    scheduler = AdaptiveScheduler(cpu_budget=0.5, max_fps=10, min_fps=1, idle_fps=2)
+    seconds = {"focused": 0.0, "distracted": 0.0, "idle": 0.0}
+    idle_spans = []
+    t = 0.0
+    while t < end:
+        here = not leave_at <= t < back_at
+        delta = clock.frame_delta(t)
+        face = False
+        if presence.should_detect(PERSON if here else EMPTY, t):
+            face = here
+            presence.update(face, t)
+        seconds["focused" if face else "distracted"] += delta
+        if presence.idle:
+            seconds["idle"] += delta
+            idle_spans.append(t)
+        scheduler.idle = presence.idle
+        t = round(t + scheduler.analysis_interval, 6)
+    return presence, seconds, idle_spans
+
+
+def test_away_time_is_counted_while_idle():
+    presence, seconds, idle_spans = run_desk(leave_at=10.0, back_at=60.0, end=90.0)
+    assert presence.idle_periods == 1
+    assert idle_spans[0] == pytest.approx(30.0, abs=0.2)  # idle_after seconds after the last face frame
+    assert idle_spans[-1] < 60.0  # the first frame back ends idle mode
+    assert not presence.idle
+    # Idle frames are 0.5 s apart (idle_fps), well under MAX_FRAME_GAP: nothing is lost
+    assert seconds["idle"] == pytest.approx(30.0, abs=0.6)
+    assert seconds["distracted"] == pytest.approx(50.0, abs=0.6)
+    assert seconds["focused"] + seconds["distracted"] == pytest.approx(90.0, abs=0.2)
+    assert presence.skipped_frames > 0
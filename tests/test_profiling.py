@@ -0,0 +1,48 @@
+import gc
+import threading
+
+import profiling
+from profiling import StageProfiler, GcMonitor
+
+
+def _in_thread(fn, timeout=5.0):
+    # Runs fn on a daemon thread; a deadlock shows up as a thread still alive
+    out = {}
+    thread = threading.Thread(target=lambda: out.setdefault("value", fn()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "deadlocked"
+    return out["value"]
+
+
+def test_gc_inside_summary_does_not_deadlock(monkeypatch):
+    profiler = StageProfiler()
+    profiler.record("detect", 0.01)
+    original = profiling.LatencyHistogram.percentile
+
+    def collecting_percentile(self, q):
+        gc.collect()  # a collection while summary() holds the lock
+        return original(self, q)
+
+    monkeypatch.setattr(profiling.LatencyHistogram, "percentile", collecting_percentile)
+    monitor = GcMonitor(profiler).start()
+    try:
+        summary = _in_thread(profiler.summary)
+    finally:
+        monitor.stop()
+    assert any(row["stage"] == "detect" for row in summary)
+    # The pauses recorded during the first summary are folded in by the next one
+    stages = {row["stage"] for row in _in_thread(profiler.summary)}
+    assert "gc_gen2" in stages
+
+
+def test_gc_pauses_show_up_in_dump(tmp_path):
+    profiler = StageProfiler()
+    monitor = GcMonitor(profiler).start()
+    try:
+        gc.collect()
+    finally:
+        monitor.stop()
+    path = profiler.dump(str(tmp_path / "profile.json"))
+    with open(path) as f:
+        assert '"gc_gen2"' in f.read()
@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from config import EMOTION_CLASSES
+from frame_result import FrameResult, STATES, FLAG_FACE
+from recorder import LandmarkRecorder, Recording, META_FILE
+
+
+def make_results(n, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for i in range(n):
+        result = FrameResult(100.0 + i / 10, 0.1)
+        result.state = STATES[i % len(STATES)]
+        if i % 3:  # every third frame has no face
+            result.landmarks = rng.integers(0, 640, (68, 2))
+            result.face_box = (i, i + 1, 50, 60)
+            result.emotion_scores = rng.random(len(EMOTION_CLASSES)).astype(np.float32)
+        results.append(result)
+    return results
+
+
+def check_rows(recording, results):
+    n = len(results)
+    assert len(recording) == n
+    np.testing.assert_array_equal(recording.field("timestamp"), [r.timestamp for r in results])
+    np.testing.assert_allclose(recording.field("frame_time_delta"), 0.1, rtol=1e-6)
+    assert recording.field("state").tolist() == [STATES.index(r.state) for r in results]
+    assert recording.field("flags").tolist() == [r.flags for r in results]
+
+    landmarks = recording.field("landmarks")
+    boxes = recording.field("face_box")
+    scores = recording.field("emotion_scores")
+    for i, r in enumerate(results):
+        if r.landmarks is None:
+            assert not landmarks[i].any()
+            assert boxes[i].tolist() == [-1] * 4
+            assert np.isnan(scores[i]).all()
+        else:
+            np.testing.assert_array_equal(landmarks[i], r.landmarks)
+            assert tuple(boxes[i]) == r.face_box
+            np.testing.assert_array_equal(scores[i], r.emotion_scores)
+
+
+def test_round_trip_over_several_chunks(tmp_path):
+    results = make_results(23)
+    recorder = LandmarkRecorder(str(tmp_path / "rec"), chunk_rows=10, meta_every=4)
+    for result in results:
+        recorder.append(result)
+    recorder.close()
+
+    recording = Recording(str(tmp_path / "rec"))
+    assert recording.meta["chunks"] == 3
+    # The last chunk file holds 10 rows; only the 3 written are read back
+    assert [len(chunk) for chunk in recording.chunks()] == [10, 10, 3]
+    check_rows(recording, results)
+    assert recording.field("flags")[1] & FLAG_FACE
+
+
+def test_exact_chunk_multiple(tmp_path):
+    results = make_results(20)
+    recorder = LandmarkRecorder(str(tmp_path / "rec"), chunk_rows=10, meta_every=4)
+    for result in results:
+        recorder.append(result)
+    recorder.close()
+    recording = Recording(str(tmp_path / "rec"))
+    assert [len(chunk) for chunk in recording.chunks()] == [10, 10]
+    check_rows(recording, results)
+
+
+def test_unclean_close_keeps_rows_up_to_the_last_meta_write(tmp_path):
+    results = make_results(23)
+    recorder = LandmarkRecorder(str(tmp_path / "rec"), chunk_rows=10, meta_every=4)
+    for result in results:
+        recorder.append(result)
+    # No close(): meta.json was last written at row 20 (meta_every and the third chunk)
+    with open(os.path.join(recorder.path, META_FILE)) as f:
+        assert json.load(f)["rows"] == 20
+
+    recording = Recording(recorder.path)
+    assert [len(chunk) for chunk in recording.chunks()] == [10, 10]
+    check_rows(recording, results[:20])
+
+
+def test_empty_recording(tmp_path):
+    LandmarkRecorder(str(tmp_path / "rec")).close()
+    recording = Recording(str(tmp_path / "rec"))
+    assert len(recording) == 0
+    assert recording.field("landmarks").shape == (0, 68, 2)
@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rescore import FeatureSeries, make_grid, rescore, _closed_run_length, _count_alerts, _forward_fill
+
+T, F = True, False
+
+
+def test_closed_run_length_counts_face_frames():
+    closed = np.array([[T, T, F, T, T, T]])
+    assert _closed_run_length(closed, np.ones(6, bool)).tolist() == [[1, 2, 0, 1, 2, 3]]
+
+
+def test_closed_run_length_skips_faceless_frames():
+    # The face-less frame neither extends nor resets the run
+    closed = np.array([[T, T, T, T], [T, F, F, T]])
+    has_face = np.array([T, F, T, T])
+    assert _closed_run_length(closed, has_face).tolist() == [[1, 1, 2, 3], [1, 1, 0, 1]]
+
+
+def test_forward_fill():
+    values = np.array([[T, F, F, T], [F, T, F, F]])
+    valid = np.array([F, T, F, T])
+    assert _forward_fill(values, valid).tolist() == [[F, F, F, T], [F, T, T, F]]
+
+
+def test_count_alerts_cooldown():
+    flags = np.array([[T, T, T, T, T], [F, F, T, F, F], [F] * 5])
+    timestamp = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    # Row 0 fires at t=0 and t=3 (2 - 0 is not more than the cooldown)
+    assert _count_alerts(flags, timestamp, 2.0).tolist() == [2, 1, 0]
+
+
+def test_count_alerts_matches_tracker_loop():
+    rng = np.random.default_rng(0)
+    flags = rng.random((20, 200)) < 0.3
+    timestamp = np.cumsum(rng.uniform(0.05, 0.5, 200))
+    expected = []
+    for row in flags:
+        count, last = 0, None
+        for raised, t in zip(row, timestamp):
+            if raised and (last is None or t - last > 5.0):
+                count, last = count + 1, t
+        expected.append(count)
+    assert _count_alerts(flags, timestamp, 5.0).tolist() == expected
+
+
+def test_rescore_small_session():
+    # Frame 2 has no face: distracted, and the eye counter carries over it
+    series = FeatureSeries(
+        timestamp=np.array([0.0, 0.5, 1.0, 1.5]),
+        frame_time_delta=np.full(4, 0.5),
+        has_face=np.array([T, T, F, T]),
+        ear=np.array([0.1, 0.1, 0.0, 0.1]),
+        mar=np.full(4, 0.1),
+        posture_deviation=np.zeros(4),
+        nose_below_chin=np.zeros(4, bool),
+        emotion_idx=np.full(4, -1),
+    )
+    grid = make_grid(eye_ar_thresh=(0.2, 0.05), eye_ar_consec_frames=(2,), mouth_ar_thresh=(0.6,),
+                     posture_max_deviation=(40,))
+    out = rescore(series, grid, cooldown=10.0)
+    assert out["focused_seconds"].tolist() == [0.5, 1.5]
+    assert out["distracted_seconds"].tolist() == [0.5, 0.5]
+    assert out["drowsy_seconds"].tolist() == [1.0, 0.0]
+    assert out["blink_alerts"].tolist() == [1, 0]
+    assert out["yawn_alerts"].tolist() == [0, 0]
+    assert out["alerts"].tolist() == [1, 0]
@@ -0,0 +1,74 @@
+import pytest
+
+import db
+
+
+def session(username, start_time, focused, distracted, drowsy, alerts=0):
+    return {"username": username, "start_time": start_time, "end_time": start_time,
+            "focused_seconds": focused, "distracted_seconds": distracted, "drowsy_seconds": drowsy,
+            "alerts": alerts}
+
+
+def rollups(conn):
+    daily = conn.execute("SELECT * FROM daily_rollup ORDER BY username, day").fetchall()
+    users = conn.execute("SELECT * FROM user_rollup ORDER BY username").fetchall()
+    return daily, users
+
+
+def assert_same_rows(a, b):
+    assert len(a) == len(b)
+    for row_a, row_b in zip(a, b):
+        assert row_a == pytest.approx(row_b)
+
+
+def add_sessions():
+    db.insert_session(session("ana", "2024-03-01 09:00:00", 60, 30, 10, alerts=2))
+    db.insert_session(session("ana", "2024-03-01 14:00:00", 0, 0, 0))  # zero-length
+    db.insert_sessions([session("ana", "2024-03-02 09:00:00", 30, 10, 0, alerts=1),
+                        session("ben", "2024-03-01 10:00:00", 10, 10, 0)])
+    live = db.begin_session("ben", "2024-03-02 11:00:00")
+    db.end_session(live, session("ben", "2024-03-02 11:00:00", 45, 0, 15, alerts=3))
+    db.begin_session("ben", "2024-03-03 08:00:00")  # still running: not counted
+
+
+def test_incremental_rollups_match_rebuild(database):
+    add_sessions()
+    incremental = rollups(database)
+    db.rebuild_rollups()
+    rebuilt = rollups(database)
+    assert_same_rows(incremental[0], rebuilt[0])
+    assert_same_rows(incremental[1], rebuilt[1])
+
+
+def test_rollup_values(database):
+    add_sessions()
+    daily, users = rollups(database)
+    # username, day, sessions, focused, distracted, drowsy, alerts, focus % sum, focus sessions
+    assert daily[0] == pytest.approx(("ana", "2024-03-01", 2, 60, 30, 10, 2, 60.0, 1))
+    assert daily[1] == pytest.approx(("ana", "2024-03-02", 1, 30, 10, 0, 1, 75.0, 1))
+    assert daily[2] == pytest.approx(("ben", "2024-03-01", 1, 10, 10, 0, 0, 50.0, 1))
+    assert daily[3] == pytest.approx(("ben", "2024-03-02", 1, 45, 0, 15, 3, 75.0, 1))
+    assert users[0] == pytest.approx(("ana", 3, 90, 40, 10, 3, 135.0, 2,
+                                      "2024-03-01 09:00:00", "2024-03-02 09:00:00"))
+    assert users[1] == pytest.approx(("ben", 2, 55, 10, 15, 3, 125.0, 2,
+                                      "2024-03-01 10:00:00", "2024-03-02 11:00:00"))
+
+    assert db.fetch_totals("ana") == pytest.approx((3, 140, 67.5))
+    assert db.fetch_totals() == pytest.approx((5, 220, 65.0))
+
+
+def test_zero_length_sessions_only(database):
+    db.insert_session(session("cat", "2024-03-01 09:00:00", 0, 0, 0))
+    incremental = rollups(database)
+    db.rebuild_rollups()
+    assert_same_rows(incremental[1], rollups(database)[1])
+    assert db.fetch_totals("cat") == (1, 0, None)
+    assert db.fetch_daily(username="cat") == [("2024-03-01", 1, 0, None, 0)]
+
+
+def test_discarded_session_leaves_rollups_alone(database):
+    db.insert_session(session("ana", "2024-03-01 09:00:00", 60, 30, 10))
+    before = rollups(database)
+    db.discard_session(db.begin_session("ana", "2024-03-01 10:00:00"))
+    assert rollups(database) == before
+    assert database.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 1
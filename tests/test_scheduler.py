@@ -0,0 +1,64 @@
+import pytest
+
+from scheduler import AdaptiveScheduler
+
+
+def make_scheduler():
+    return AdaptiveScheduler(cpu_budget=0.5, max_fps=15, min_fps=1, idle_fps=2)
+
+
+def test_interval_starts_at_max_fps():
+    assert make_scheduler().analysis_interval == pytest.approx(1 / 15)
+
+
+def test_interval_follows_latency_budget():
+    s = make_scheduler()
+    s.record_latency(0.08)  # 80 ms at a 0.5 budget -> 160 ms
+    assert s.analysis_interval == pytest.approx(0.16)
+    assert s.analysis_fps == pytest.approx(6.25)
+
+
+def test_interval_capped_at_min_fps():
+    s = make_scheduler()
+    s.record_latency(2.0)
+    assert s.analysis_interval == pytest.approx(1.0)
+
+
+def test_interval_never_beats_the_camera():
+    s = make_scheduler()
+    s.record_frame(0.0)
+    s.record_frame(0.1)  # 10 fps camera
+    s.record_latency(0.01)
+    assert s.analysis_interval == pytest.approx(0.1)
+
+
+def test_idle_drops_to_idle_fps():
+    s = make_scheduler()
+    s.record_latency(0.08)
+    s.idle = True
+    assert s.analysis_interval == pytest.approx(0.5)
+    s.idle = False
+    assert s.analysis_interval == pytest.approx(0.16)
+
+
+def test_idle_never_speeds_up_a_slow_estimator():
+    s = make_scheduler()
+    s.record_latency(2.0)
+    s.idle = True
+    assert s.analysis_interval == pytest.approx(1.0)
+
+
+def test_latency_is_smoothed():
+    s = make_scheduler()
+    s.record_latency(0.1)
+    s.record_latency(0.2)  # 0.1 + 0.2 * (0.2 - 0.1)
+    assert s.process_time == pytest.approx(0.12)
+
+
+def test_should_analyze_spaces_offers():
+    s = make_scheduler()
+    s.record_frame(0.0)
+    s.record_frame(0.1)
+    s.record_latency(0.08)  # 160 ms interval, 50 ms slack
+    offers = [t / 10 for t in range(10) if s.should_analyze(t / 10)]
+    assert offers == [0.0, 0.2, 0.4, 0.6, 0.8]
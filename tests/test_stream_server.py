@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+import stream_server
+from config import MAX_FRAME_GAP
+from frame_clock import FrameClock
+from stream_server import StreamServer
+from video_source import SyntheticSource
+
+
+class CountingEstimator(FrameClock):
+    # Counts every analysed frame as focused; no models needed
+    blink_alert = yawn_alert = False
+
+    def __init__(self):
+        self.timestamps = []
+        self.focused_seconds = self.distracted_seconds = self.drowsy_seconds = 0.0
+
+    def process_frame(self, frame, timestamp=None):
+        self.focused_seconds += self.frame_delta(timestamp)
+        self.timestamps.append(timestamp)
+
+
+def test_fast_files_count_the_clip_length(monkeypatch):
+    # 10 s of media read as fast as possible: every tick's frame must be one
+    # tick of media time after the last, not whatever the file had reached
+    monkeypatch.setattr(stream_server, "make_estimator", lambda mode, **options: CountingEstimator())
+    server = StreamServer("normal", tick_fps=5, workers=1)
+    station = server.add_stream("clip", SyntheticSource(count=300, width=64, height=48, fps=30), lossless=True)
+    try:
+        server.run(duration=30)
+    finally:
+        server.stop()
+
+    e = station.estimator
+    gaps = [b - a for a, b in zip(e.timestamps, e.timestamps[1:])]
+    assert station.analysed == len(e.timestamps) > 30
+    assert max(gaps) < 0.3 < MAX_FRAME_GAP
+    assert e.focused_seconds == pytest.approx(e.timestamps[-1] - e.timestamps[0])
+    assert e.focused_seconds > 9.5
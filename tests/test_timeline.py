@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+import db
+from frame_clock import FrameClock
+from frame_result import FrameResult, STATES, FOCUSED, DISTRACTED, DROWSY, FLAG_FACE, FLAG_BLINK
+from timeline import TimelineWriter
+
+
+class Totals(FrameClock):
+    # The estimators' per-state counters, for the results fed to the writer
+    def __init__(self):
+        self.seconds = dict.fromkeys(STATES, 0.0)
+
+    def result(self, timestamp, state, ear=None, blink=False):
+        result = FrameResult(timestamp, self.frame_delta(timestamp))
+        result.state = state
+        if ear is not None:
+            result.landmarks = object()  # any face
+            result.ear, result.mar = ear, 0.1
+        result.blink_alert = blink
+        self.seconds[state] += result.frame_time_delta
+        return result
+
+
+def session_results(totals, start=1000.0):
+    # 10 s at 4 fps: 4 s focused, 2 s distracted (no face), 4 s drowsy
+    states = [FOCUSED] * 4 + [DISTRACTED] * 2 + [DROWSY] * 4
+    results = []
+    for second, state in enumerate(states):
+        for quarter in range(4):
+            face = state != DISTRACTED
+            results.append(totals.result(start + second + quarter / 4 + 0.25, state,
+                                         ear=0.3 - 0.1 * (state == DROWSY) if face else None,
+                                         blink=state == DROWSY and quarter == 3))
+    return results
+
+
+def test_rows_match_estimator_totals(database):
+    session_id = db.begin_session("ana", "2024-03-01 09:00:00")
+    writer = TimelineWriter(session_id, flush_seconds=60)
+    totals = Totals()
+    for result in session_results(totals):
+        writer.append(result)
+    assert writer.close() == 10
+
+    rows = db.fetch_timeline(session_id)
+    assert [second for second, *_ in rows] == list(range(10))
+    counted = dict.fromkeys(STATES, 0)
+    for _, state, *_ in rows:
+        counted[STATES[state]] += 1
+    # One row per second; the first frame stands for no time
+    for state in STATES:
+        assert counted[state] == pytest.approx(totals.seconds[state], abs=0.25)
+
+    second, state, ear, mar, emotion, flags = rows[0]
+    assert (STATES[state], ear, mar, emotion, flags) == (FOCUSED, pytest.approx(0.3), pytest.approx(0.1), None,
+                                                         FLAG_FACE)
+    assert rows[4][2:] == (None, None, None, 0)  # distracted: no face
+    assert rows[9][2] == pytest.approx(0.2)
+    assert rows[9][5] == FLAG_FACE | FLAG_BLINK
+
+
+def test_majority_state_wins_a_mixed_second(database):
+    session_id = db.begin_session("ana", "2024-03-01 09:00:00")
+    writer = TimelineWriter(session_id, flush_seconds=60)
+    totals = Totals()
+    for t, state in ((0.0, FOCUSED), (0.2, FOCUSED), (0.4, DROWSY), (0.9, DROWSY), (1.1, FOCUSED)):
+        writer.append(totals.result(t, state))
+    writer.close()
+    assert [(second, STATES[state]) for second, state, *_ in db.fetch_timeline(session_id)] == \
+        [(0, DROWSY), (1, FOCUSED)]
+
+
+def test_background_flush(database):
+    session_id = db.begin_session("ana", "2024-03-01 09:00:00")
+    writer = TimelineWriter(session_id, flush_seconds=0.05)
+    totals = Totals()
+    try:
+        for result in session_results(totals):
+            writer.append(result)
+        # Whole seconds are written without close(); the current one is held back
+        deadline = time.monotonic() + 5
+        while writer.rows_written < 9 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.rows_written == 9
+        assert len(db.fetch_timeline(session_id)) == 9
+    finally:
+        writer.close()
+    assert writer.error is None
+    assert len(db.fetch_timeline(session_id)) == 10
@@ -0,0 +1,107 @@
+import math
+import threading
+from collections import deque
+
+import db
+from config import TIMELINE_FLUSH_SECONDS
+from frame_result import STATES
+
+_STATE_CODES = {state: i for i, state in enumerate(STATES)}
+
+
+class _Second:
+    # Accumulates the FrameResults of one second of the session
+    __slots__ = ("index", "state_time", "ear_sum", "mar_sum", "face_frames", "emotion", "flags")
+
+    def __init__(self, index):
+        self.index = index
+        self.state_time = [0.0] * len(STATES)
+        self.ear_sum = 0.0
+        self.mar_sum = 0.0
+        self.face_frames = 0
+        self.emotion = None
+        self.flags = 0
+
+    def add(self, result):
+        self.state_time[_STATE_CODES[result.state]] += result.frame_time_delta
+        if result.ear is not None:
+            self.ear_sum += result.ear
+            self.mar_sum += result.mar
+            self.face_frames += 1
+        if result.emotion is not None:
+            self.emotion = result.emotion
+        self.flags |= result.flags
+
+    def row(self, session_id):
+        # The state that took up most of the second; means over face frames
+        state = max(range(len(STATES)), key=self.state_time.__getitem__)
+        ear = self.ear_sum / self.face_frames if self.face_frames else None
+        mar = self.mar_sum / self.face_frames if self.face_frames else None
+        return (session_id, self.index, state, ear, mar, self.emotion, self.flags)
+
+
+class TimelineWriter:
+    # Per-second focus timeline of a live session. append() runs on the
+    # analysis thread and only folds the result into the current second; whole
+    # seconds are queued and written in one transaction every `flush_seconds`
+    # by a background thread on its own WAL connection, so a slow disk or a
+    # busy database never holds up the frame loop.
+    def __init__(self, session_id, flush_seconds=TIMELINE_FLUSH_SECONDS):
+        self.session_id = session_id
+        self.flush_seconds = flush_seconds
+        self._pending = deque()  # finished rows; append / popleft are thread-safe
+        self._current = None
+        self._start = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.rows_written = 0
+        self.error = None
+        self._thread.start()
+
+    def append(self, result):
+        if result.timestamp is None:
+            return
+        if self._start is None:
+            self._start = result.timestamp
+        index = int(math.floor(result.timestamp - self._start))
+        if self._current is None or index != self._current.index:
+            if self._current is not None:
+                self._pending.append(self._current.row(self.session_id))
+            self._current = _Second(index)
+        self._current.add(result)
+
+    def _flush(self, conn):
+        rows = []
+        while self._pending:
+            rows.append(self._pending.popleft())
+        if not rows:
+            return
+        try:
+            db.insert_timeline(rows, conn)
+        except Exception:
+            self._pending.extendleft(reversed(rows))  # retried on the next flush
+            raise
+        self.rows_written += len(rows)
+
+    def _run(self):
+        conn = db.connect()
+        try:
+            while True:
+                stopping = self._stop_event.wait(self.flush_seconds)
+                try:
+                    self._flush(conn)
+                except Exception as e:  # e.g. database locked for longer than the timeout
+                    self.error = e
+                if stopping:
+                    break
+        finally:
+            conn.close()
+
+    def close(self, timeout=10.0):
+        # Call after the analysis thread has stopped: writes the last partial second
+        if self._current is not None:
+            self._pending.append(self._current.row(self.session_id))
+            self._current = None
+        self._stop_event.set()
+        self._thread.join(timeout)
+        return self.rows_written
@@ -0,0 +1,254 @@
+import glob
+import os
+import struct
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+from config import (
+    VIDEO_SOURCE, CAMERA_INDEX, CAPTURE_WIDTH, CAPTURE_HEIGHT, CAPTURE_FPS, CAPTURE_FOURCC
+)
+
+
+class VideoSource(ABC):
+    # cv2.VideoCapture-like interface used by the live loop:
+    #   grab()     -> bool, advance to the next frame without decoding it
+    #   retrieve() -> (ok, frame), decode the grabbed frame
+    # Every source stamps grabbed frames on its own clock (`timestamp`, seconds
+    # on the time.monotonic() scale), so analysis never assumes a frame rate.
+    def __init__(self):
+        self.timestamp = None
+        self.frame_count = 0
+
+    def is_opened(self):
+        return True
+
+    @abstractmethod
+    def grab(self):
+        ...
+
+    @abstractmethod
+    def retrieve(self):
+        ...
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        # (timestamp, frame) until the source runs out
+        while True:
+            ok, frame = self.read()
+            if not ok:
+                return
+            yield self.timestamp, frame
+
+
+class CameraSource(VideoSource):
+    def __init__(self, index=CAMERA_INDEX, width=CAPTURE_WIDTH, height=CAPTURE_HEIGHT,
+                 fps=CAPTURE_FPS, fourcc=CAPTURE_FOURCC):
+        super().__init__()
+        # Drivers may ignore any of these requests; the grabber works with
+        # whatever they deliver. With a compressed format (MJPG), frames that
+        # are only grabbed are never JPEG-decoded.
+        self.cap = cv2.VideoCapture(index)
+        if self.cap.isOpened():
+            if fourcc:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def grab(self):
+        if not self.cap.grab():
+            return False
+        self.timestamp = time.monotonic()
+        self.frame_count += 1
+        return True
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def release(self):
+        self.cap.release()
+
+
+class PacedSource(VideoSource):
+    # Frames at a nominal fps. realtime=True plays them at that rate (sleeping
+    # between frames); realtime=False delivers them as fast as they can be read,
+    # stamped with media time so counters still add up to the clip length.
+    def __init__(self, fps, realtime=True):
+        super().__init__()
+        self.fps = fps
+        self.realtime = realtime
+        self._start = None
+
+    def _advance(self):
+        if self._start is None:
+            self._start = time.monotonic()
+        media_time = self.frame_count / self.fps
+        if self.realtime:
+            delay = self._start + media_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.timestamp = self._start + media_time
+        self.frame_count += 1
+
+
+class FileSource(PacedSource):
+    def __init__(self, path, realtime=True, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self.path = path
+        self.loop = loop
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def grab(self):
+        ok = self.cap.grab()
+        if not ok and self.loop and self.frame_count > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok = self.cap.grab()
+        if not ok:
+            return False
+        self._advance()
+        return True
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource(PacedSource):
+    # Sorted *.jpg / *.png files; images are only read from disk in retrieve()
+    def __init__(self, path, fps=CAPTURE_FPS, realtime=False, loop=False):
+        super().__init__(fps, realtime)
+        self.files = sorted(
+            f for ext in ("*.jpg", "*.jpeg", "*.png", "*.bmp") for f in glob.glob(os.path.join(path, ext))
+        )
+        self.loop = loop
+        self._index = -1
+
+    def is_opened(self):
+        return len(self.files) > 0
+
+    def grab(self):
+        self._index += 1
+        if self._index >= len(self.files):
+            if not (self.loop and self.files):
+                return False
+            self._index = 0
+        self._advance()
+        return True
+
+    def retrieve(self):
+        frame = cv2.imread(self.files[self._index])
+        return frame is not None, frame
+
+
+class SyntheticSource(PacedSource):
+    # Noisy background with a slowly drifting patch. If `face` (a BGR image)
+    # is given it is pasted as the patch, so the landmark path gets exercised;
+    # otherwise every frame takes the no-face path. count=None never ends.
+    def __init__(self, count=None, width=CAPTURE_WIDTH, height=CAPTURE_HEIGHT, fps=CAPTURE_FPS,
+                 realtime=False, face=None, seed=0):
+        super().__init__(fps, realtime)
+        self.count = count
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+        patch = face if face is not None else np.full((160, 130, 3), 180, dtype=np.uint8)
+        self.patch = patch[:height, :width]
+
+    def grab(self):
+        if self.count is not None and self.frame_count >= self.count:
+            return False
+        self._advance()
+        return True
+
+    def retrieve(self):
+        i = self.frame_count - 1
+        height, width = self.background.shape[:2]
+        ph, pw = self.patch.shape[:2]
+        x = int(np.clip((width - pw) / 2 + 40 * np.sin(i / 30.0), 0, width - pw))
+        y = int(np.clip((height - ph) / 2 + 10 * np.cos(i / 45.0), 0, height - ph))
+        frame = self.background.copy()
+        frame[y:y + ph, x:x + pw] = self.patch
+        return True, frame
+
+
+class SocketSource(VideoSource):
+    # Length-prefixed JPEG frames over a connected stream socket (see send_frame).
+    # Frames are stamped on arrival; JPEG decoding happens in retrieve().
+    HEADER = struct.Struct("!I")
+
+    def __init__(self, sock):
+        super().__init__()
+        self.sock = sock
+        self._reader = sock.makefile("rb")
+        self._payload = None
+
+    def is_opened(self):
+        return self.sock.fileno() != -1
+
+    def grab(self):
+        header = self._reader.read(self.HEADER.size)
+        if len(header) < self.HEADER.size:
+            return False
+        (length,) = self.HEADER.unpack(header)
+        payload = self._reader.read(length)
+        if len(payload) < length:
+            return False
+        self._payload = payload
+        self.timestamp = time.monotonic()
+        self.frame_count += 1
+        return True
+
+    def retrieve(self):
+        frame = cv2.imdecode(np.frombuffer(self._payload, np.uint8), cv2.IMREAD_COLOR)
+        return frame is not None, frame
+
+    def release(self):
+        self._reader.close()
+        self.sock.close()
+
+
+def send_frame(sock, frame, quality=80):
+    # Client side of SocketSource
+    ok, jpeg = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise ValueError("Could not encode frame")
+    data = jpeg.tobytes()
+    sock.sendall(SocketSource.HEADER.pack(len(data)) + data)
+
+
+def open_source(spec=VIDEO_SOURCE, realtime=True, loop=False):
+    # "camera[:index]", "file:<path>", "dir:<path>" or "synthetic[:count]".
+    # Returns None if the source can't be opened.
+    kind, _, value = spec.partition(":")
+    if kind == "camera":
+        source = CameraSource(int(value) if value else CAMERA_INDEX)
+    elif kind == "file":
+        source = FileSource(value, realtime, loop)
+    elif kind == "dir":
+        source = ImageDirSource(value, realtime=realtime, loop=loop)
+    elif kind == "synthetic":
+        source = SyntheticSource(int(value) if value else None, realtime=realtime)
+    else:
+        raise ValueError(f"Unknown video source '{spec}'")
+
+    if not source.is_opened():
+        source.release()
+        return None
+    return source